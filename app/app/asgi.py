@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+# Django 3.0 runs every view on asgiref's thread pool and each of its
+# threads keeps a database connection open, so the pool size caps both the
+# requests served at once and the connections used. asgiref reads this
+# when it is first imported.
+os.environ.setdefault('ASGI_THREADS', '8')
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.urls import get_resolver  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+# Import every view up front, as app/wsgi.py does.
+get_resolver().url_patterns
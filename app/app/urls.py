@@ -13,11 +13,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from core.views import DatabasePoolStatsView, serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
+    path('api/db-pool-stats/', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
 ]
+
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns.append(
+        re_path(r'^{}(?P<path>.+)$'.format(re.escape(settings.MEDIA_URL.lstrip('/'))), serve_media, name='media'),
+    )
@@ -10,7 +10,13 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf, and with it every view and serializer, now rather
+# than on the first request. Under gunicorn's preload_app this happens once
+# in the master and the workers share it.
+get_resolver().url_patterns
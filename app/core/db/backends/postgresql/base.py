@@ -0,0 +1,82 @@
+"""PostgreSQL backend that reuses connections from a process wide pool
+
+Enable it with ``'ENGINE': 'core.db.backends.postgresql'`` and tune the
+pool with an optional ``POOL`` dict next to ``OPTIONS``::
+
+    'POOL': {'MAX_SIZE': 10, 'MAX_LIFETIME': 1800, 'CHECK_AFTER': 30, 'TIMEOUT': 5}
+
+Keep ``CONN_MAX_AGE`` at 0 so every request hands its connection back to
+the pool when it finishes.
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import PoolTimeout, get_pool
+
+
+Database = base.Database
+
+POOL_OPTIONS = {
+    'MAX_SIZE': 'max_size',
+    'MAX_LIFETIME': 'max_lifetime',
+    'CHECK_AFTER': 'check_after',
+    'TIMEOUT': 'timeout',
+}
+
+
+def _check(connection):
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def _reset(connection):
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL') or {}
+        params = self.get_connection_params()
+        # Test database setup reuses the alias for other database names.
+        target = dict(dict.fromkeys(('user', 'host', 'port', 'database'), ''), **params)
+        name = '{alias} {user}@{host}:{port}/{database}'.format(alias=self.alias, **target)
+        return get_pool(
+            name,
+            lambda: Database.connect(**params),
+            check=_check,
+            reset=_reset,
+            **{name: options[key] for key, name in POOL_OPTIONS.items() if key in options},
+        )
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc))
+
+        # The same isolation level handling as the base backend, for pooled
+        # connections that already carry the session settings.
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # A connection closed inside an atomic block stays attached to this
+        # wrapper until the block exits, so it must not be shared.
+        with self.wrap_database_errors:
+            self.pool.release(self.connection, discard=self.in_atomic_block)
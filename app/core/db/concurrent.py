@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+
+def _call(func):
+    # Worker threads keep their own connection between tasks, so apply the
+    # same CONN_MAX_AGE and health rules a request thread would.
+    close_old_connections()
+    return func()
+
+
+class QueryExecutor:
+    """Runs independent read queries at the same time on their own connections
+
+    Each worker thread holds one database connection, so at most
+    ``workers`` extra connections are opened per process.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-query')
+
+    def map(self, funcs, using='default'):
+        """Results of calling each of ``funcs``, in order
+
+        Inside a transaction the queries must see its uncommitted rows, so
+        they run one after the other on the caller's connection.
+        """
+        funcs = list(funcs)
+        if len(funcs) < 2 or connections[using].in_atomic_block:
+            return [func() for func in funcs]
+        futures = [self.executor.submit(_call, func) for func in funcs]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_query_executor():
+    """The shared executor, or ``None`` while ``DB_CONCURRENT_QUERY_WORKERS`` is 0"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'DB_CONCURRENT_QUERY_WORKERS', 0)
+            if not workers:
+                return None
+            _executor = QueryExecutor(workers)
+        return _executor
+
+
+def reset_query_executor():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def run_queries(funcs, using='default'):
+    """Call each of ``funcs``, concurrently when an executor is configured"""
+    executor = get_query_executor()
+    if executor is None:
+        return [func() for func in funcs]
+    return executor.map(funcs, using)
@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """A bounded, thread safe pool of DB-API connections
+
+    ``connect`` opens a new connection. Before a pooled connection is handed
+    out again it is dropped once older than ``max_lifetime`` seconds, and
+    checked with ``check`` once it has been idle for ``check_after``
+    seconds. ``reset`` runs when a connection comes back, and a connection
+    it fails on is dropped. Once ``max_size`` connections are in use,
+    ``acquire`` waits up to ``timeout`` seconds for one to come back.
+    """
+
+    def __init__(self, connect, max_size=10, max_lifetime=1800, check_after=30, timeout=5,
+                 check=None, reset=None, close=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.timeout = timeout
+        self.check = check
+        self.reset = reset
+        self.close = close or (lambda connection: connection.close())
+
+        self._lock = threading.Condition()
+        # (connection, created at, returned at), most recently returned last
+        self._idle = deque()
+        # id(connection) -> created at
+        self._in_use = {}
+        self._waiting = 0
+        self._stats = dict.fromkeys(
+            ('checkouts', 'created', 'discarded', 'health_checks', 'waits', 'timeouts'), 0,
+        )
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def _close(self, connection):
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def _usable(self, connection, created_at, returned_at):
+        now = time.monotonic()
+        if self.max_lifetime is not None and now - created_at > self.max_lifetime:
+            return False
+        if self.check is not None and now - returned_at >= self.check_after:
+            with self._lock:
+                self._stats['health_checks'] += 1
+            try:
+                self.check(connection)
+            except Exception:
+                return False
+        return True
+
+    def _wait(self, deadline):
+        """Wait, holding the lock, until a connection is idle or there is room for one"""
+        waited = False
+        while not self._idle and len(self._in_use) >= self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats['timeouts'] += 1
+                raise PoolTimeout(f'No connection available within {self.timeout}s, all {self.max_size} are in use')
+            waited = True
+            self._waiting += 1
+            try:
+                self._lock.wait(remaining)
+            finally:
+                self._waiting -= 1
+        return waited
+
+    def acquire(self):
+        """Check out a connection, opening one while the pool has room
+
+        Health checks and new connections run without holding the lock, on
+        a slot reserved in ``_in_use``.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self._lock:
+                waited = self._wait(deadline) or waited
+                if self._idle:
+                    connection, created_at, returned_at = self._idle.pop()
+                    self._in_use[id(connection)] = created_at
+                else:
+                    connection = None
+                    slot = object()
+                    self._in_use[id(slot)] = None
+            if connection is None or self._usable(connection, created_at, returned_at):
+                break
+            self._release_slot(connection, discarded=True)
+            self._close(connection)
+
+        if connection is None:
+            try:
+                connection = self.connect()
+            except Exception:
+                self._release_slot(slot)
+                raise
+            with self._lock:
+                del self._in_use[id(slot)]
+                self._in_use[id(connection)] = time.monotonic()
+                self._stats['created'] += 1
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            if waited:
+                wait_time = time.monotonic() - started
+                self._stats['waits'] += 1
+                self._wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+        return connection
+
+    def _release_slot(self, connection, discarded=False):
+        with self._lock:
+            created_at = self._in_use.pop(id(connection))
+            if discarded:
+                self._stats['discarded'] += 1
+            self._lock.notify()
+        return created_at
+
+    def release(self, connection, discard=False):
+        """Return a checked out connection, or close it with ``discard``"""
+        if not discard and self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+        with self._lock:
+            created_at = self._in_use[id(connection)]
+        now = time.monotonic()
+        if discard or (self.max_lifetime is not None and now - created_at > self.max_lifetime):
+            self._release_slot(connection, discarded=True)
+            self._close(connection)
+            return
+        with self._lock:
+            del self._in_use[id(connection)]
+            self._idle.append((connection, created_at, now))
+            self._lock.notify()
+
+    def clear(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle = [connection for connection, _, _ in self._idle]
+            self._idle.clear()
+            self._stats['discarded'] += len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._lock:
+            waits = self._stats['waits']
+            return dict(
+                self._stats,
+                max_size=self.max_size,
+                size=len(self._idle) + len(self._in_use),
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                waiting=self._waiting,
+                wait_time_avg=self._wait_time / waits if waits else 0.0,
+                wait_time_max=self._max_wait_time,
+            )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, connect, **options):
+    """The process wide pool called ``name``, created on first use"""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ConnectionPool(connect, **options)
+        return pool
+
+
+def pool_stats():
+    """``{name: stats}`` of every pool opened by this process"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.clear()
@@ -0,0 +1,71 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def find_duplicate_names(model, using=DEFAULT_DB_ALIAS, batch_size=500):
+    """Map every duplicate row of ``model`` to the oldest row with its name
+
+    Names are compared per user and ignoring case, the same way the unique
+    ``(user_id, LOWER(name))`` index compares them.
+    """
+    rows = model._default_manager.using(using).annotate(lower_name=Lower('name'))
+    groups = rows.values('user_id', 'lower_name').annotate(copies=Count('id'), keeper=Min('id')).filter(copies__gt=1)
+    keepers = {(group['user_id'], group['lower_name']): group['keeper'] for group in groups}
+
+    duplicates = {}
+    for keys in _chunks(keepers, batch_size):
+        candidates = rows.filter(
+            user_id__in={user_id for user_id, _ in keys},
+            lower_name__in={lower_name for _, lower_name in keys},
+        )
+        for pk, user_id, lower_name in candidates.values_list('id', 'user_id', 'lower_name'):
+            keeper = keepers.get((user_id, lower_name))
+            if keeper is not None and keeper != pk:
+                duplicates[pk] = (keeper, user_id)
+    return duplicates
+
+
+def merge_duplicate_names(model, using=DEFAULT_DB_ALIAS, batch_size=500):
+    """Fold duplicate tags or ingredients into one row and relink their recipes
+
+    The recipe links of the duplicates are moved to the kept row with one
+    bulk insert per batch, skipping recipes that already link to it, before
+    the duplicates are deleted. Only ``_meta`` is used, so migrations can
+    pass their historical models. Returns the number of rows removed and
+    ``{user_id: {recipe ids}}`` of the recipes whose links changed.
+    """
+    duplicates = find_duplicate_names(model, using, batch_size)
+    field = model._meta.get_field('recipe').field
+    through = field.remote_field.through
+    source = f'{field.m2m_field_name()}_id'
+    target = f'{field.m2m_reverse_field_name()}_id'
+    links = through._default_manager.using(using)
+
+    affected = {}
+    with transaction.atomic(using=using):
+        for batch in _chunks(duplicates, batch_size):
+            moved = list(links.filter(**{f'{target}__in': batch}).values_list(source, target))
+            keepers = {duplicates[duplicate_id][0] for _, duplicate_id in moved}
+            existing = set(links.filter(**{
+                f'{source}__in': {recipe_id for recipe_id, _ in moved},
+                f'{target}__in': keepers,
+            }).values_list(source, target))
+
+            new_links = set()
+            for recipe_id, duplicate_id in moved:
+                keeper, user_id = duplicates[duplicate_id]
+                affected.setdefault(user_id, set()).add(recipe_id)
+                if (recipe_id, keeper) not in existing:
+                    new_links.add((recipe_id, keeper))
+
+            links.filter(**{f'{target}__in': batch}).delete()
+            links.bulk_create([through(**{source: recipe_id, target: keeper}) for recipe_id, keeper in new_links])
+            model._default_manager.using(using).filter(pk__in=batch).delete()
+    return len(duplicates), affected
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+
+# Sent by writes that bypass the model signals (bulk inserts and updates,
+# queryset updates) with the ``user_id`` and ``recipe_ids`` they touched.
+# ``fields`` names the columns that changed when only some of them did.
+recipes_changed = Signal()
+
+# Sent with the ``user_id`` after tags or ingredients were inserted in bulk.
+attrs_created = Signal()
@@ -0,0 +1,112 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many sign ins right now, please retry shortly.')
+    default_code = 'hashing_busy'
+    # Sent as Retry-After by the DRF exception handler.
+    wait = 1
+
+
+_worker = threading.local()
+
+
+def _call(func, args):
+    _worker.active = True
+    try:
+        return func(*args)
+    finally:
+        _worker.active = False
+
+
+class HashingExecutor:
+    """Runs password hashing on a fixed number of threads
+
+    At most ``workers + max_queue`` hashes are running or queued. Callers
+    wait up to ``queue_wait`` seconds for a place and then get
+    ``HashingBusy``, so a burst of logins is turned away early instead of
+    stalling the threads that serve every other endpoint. The hashers in
+    ``hashlib`` release the GIL, so the workers hash in parallel.
+    """
+
+    def __init__(self, workers, max_queue, queue_wait=0.5):
+        self.workers = workers
+        self.queue_wait = queue_wait
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'rejected': 0}
+
+    def run(self, func, *args):
+        # Hashing that a worker itself triggers must not queue behind it.
+        if getattr(_worker, 'active', False):
+            return func(*args)
+        if not self.slots.acquire(timeout=self.queue_wait):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HashingBusy()
+        try:
+            future = self.executor.submit(_call, func, args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        with self._lock:
+            self._stats['submitted'] += 1
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, workers=self.workers)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+            _executor = HashingExecutor(
+                workers,
+                getattr(settings, 'PASSWORD_HASHING_MAX_QUEUE', 4 * workers),
+                getattr(settings, 'PASSWORD_HASHING_QUEUE_WAIT', 0.5),
+            )
+        return _executor
+
+
+def reset_hashing_executor():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def make_password(raw_password):
+    return get_hashing_executor().run(hashers.make_password, raw_password)
+
+
+def check_password(raw_password, encoded):
+    """``(valid, needs_rehash)`` for ``raw_password`` against ``encoded``
+
+    The rehash is left to the caller so it does not hash again on a worker.
+    """
+    rehash = []
+    valid = get_hashing_executor().run(hashers.check_password, raw_password, encoded, rehash.append)
+    return valid, bool(rehash)
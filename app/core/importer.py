@@ -0,0 +1,167 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.models import Ingredient, Recipe, Tag
+
+
+RECIPE_FIELDS = ('title', 'time_minutes', 'price')
+# relation name -> model of the names it holds
+NAMED_RELATIONS = {'tags': Tag, 'ingredients': Ingredient}
+
+
+def open_input(path):
+    """Open ``path`` for reading text, ``-`` being stdin and ``.gz`` files unpacked on the fly"""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def input_format(path):
+    """``csv`` or ``ndjson``, guessed from the file name"""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def read_ndjson(stream):
+    """Yield every non blank line, decoded later by ``clean_record``"""
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def read_csv(stream, separator='|'):
+    """Yield one mapping per row, splitting tags and ingredients on ``separator``"""
+    for row in csv.DictReader(stream):
+        for name in NAMED_RELATIONS:
+            value = row.get(name) or ''
+            row[name] = value.split(separator) if value else []
+        yield row
+
+
+def clean_record(record):
+    """Validate a record against the model fields
+
+    Returns the recipe fields and ``{relation: [names]}``. Relations accept
+    plain names or objects with a ``name``, as written by the recipe export.
+    """
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as exc:
+            raise ValidationError(f'Invalid JSON: {exc}')
+    if not isinstance(record, dict):
+        raise ValidationError('Expected an object.')
+    fields, errors = {}, {}
+    for name in RECIPE_FIELDS:
+        try:
+            fields[name] = Recipe._meta.get_field(name).clean(record.get(name), None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+
+    relations = {}
+    for name, model in NAMED_RELATIONS.items():
+        items = record.get(name) or []
+        names = [item.get('name') if isinstance(item, dict) else item for item in items]
+        names = [value.strip() for value in names if isinstance(value, str) and value.strip()]
+        max_length = model._meta.get_field('name').max_length
+        if len(names) != len(items) or any(len(value) > max_length for value in names):
+            errors[name] = [f'Expected a list of names of at most {max_length} characters.']
+        relations[name] = names
+
+    if errors:
+        raise ValidationError(errors)
+    return fields, relations
+
+
+class NameMap:
+    """Case insensitive name -> id map of one user's tags or ingredients
+
+    Names the map has not seen yet are looked up, and created when missing,
+    in batches through ``upsert_names``. Its results are in the order of the
+    names sent, so the map is keyed by name as given and never compares
+    case itself.
+    """
+
+    def __init__(self, model, user, batch_size=500):
+        self.model = model
+        self.user = user
+        self.batch_size = batch_size
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = [name for name in dict.fromkeys(names) if name not in self.ids]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            for name, obj in zip(batch, self.model.objects.upsert_names(self.user, batch)):
+                self.ids[name] = obj.id
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+
+class Checkpoint:
+    """The number of input records an import has committed, kept in a file
+
+    The file is replaced atomically after every batch, so after a crash at
+    most the batch that was in flight is read again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {'records': 0, 'created': 0}
+
+    def save(self, state):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as fp:
+            json.dump(state, fp)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RecipeImporter:
+    """Write batches of records for one user"""
+
+    def __init__(self, user, name_batch_size=500):
+        self.user = user
+        self.names = {
+            name: NameMap(model, user, name_batch_size) for name, model in NAMED_RELATIONS.items()
+        }
+
+    def import_batch(self, cleaned):
+        """Insert ``[(fields, relations)]`` in one transaction and return the recipe count"""
+        known = {name: dict(name_map.ids) for name, name_map in self.names.items()}
+        try:
+            with transaction.atomic():
+                for name, name_map in self.names.items():
+                    name_map.resolve({value for _, relations in cleaned for value in relations[name]})
+                recipes, links = [], []
+                for fields, relations in cleaned:
+                    recipes.append(Recipe(user=self.user, **fields))
+                    links.append({
+                        name: {self.names[name][value] for value in values} for name, values in relations.items()
+                    })
+                Recipe.objects.bulk_create_with_relations(recipes, links)
+        except Exception:
+            # Names created by the rolled back batch no longer exist.
+            for name, ids in known.items():
+                self.names[name].ids = ids
+            raise
+        return len(recipes)
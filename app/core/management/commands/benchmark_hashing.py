@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from core.hashing import HashingBusy, HashingExecutor
+from core.management.commands.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = 'Measure login password checks per second for several hashing pool sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8', help='Comma separated pool sizes')
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous login requests')
+        parser.add_argument('--max-queue', type=int, help='Queue depth, 4 times the pool size by default')
+        parser.add_argument('--queue-wait', type=float, default=0.5)
+        parser.add_argument('--hasher', help='Dotted path of a hasher class, the preferred hasher by default')
+
+    def login(self, executor, hasher, encoded):
+        started = time.perf_counter()
+        try:
+            valid = executor.run(hasher.verify, 'benchmark-password', encoded)
+        except HashingBusy:
+            return None
+        assert valid
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        try:
+            pool_sizes = [int(size) for size in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers expects a comma separated list of integers')
+        hasher = import_string(options['hasher'])() if options['hasher'] else hashers.get_hasher()
+        encoded = hasher.encode('benchmark-password', hasher.salt())
+        self.stdout.write(f'Hasher: {hasher.algorithm}, '
+                          f'{options["logins"]} logins, {options["concurrency"]} at a time')
+        self.stdout.write(f'{"workers":>7} {"logins/s":>9} {"p50 ms":>8} {"p99 ms":>8} rejected')
+
+        for workers in pool_sizes:
+            max_queue = options['max_queue'] if options['max_queue'] is not None else 4 * workers
+            executor = HashingExecutor(workers, max_queue, options['queue_wait'])
+            try:
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as requests:
+                    started = time.perf_counter()
+                    results = list(requests.map(lambda _: self.login(executor, hasher, encoded), range(options['logins'])))
+                    elapsed = time.perf_counter() - started
+            finally:
+                executor.shutdown()
+
+            latencies = sorted(seconds * 1000 for seconds in results if seconds is not None)
+            rejected = len(results) - len(latencies)
+            self.stdout.write(f'{workers:7d} {len(latencies) / elapsed:9.1f} {percentile(latencies, 0.5):8.1f} '
+                              f'{percentile(latencies, 0.99):8.1f} {rejected}')
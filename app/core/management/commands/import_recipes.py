@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import Checkpoint, RecipeImporter, clean_record, input_format, open_input, read_csv, read_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Import recipes for one user from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file, optionally gzipped, or - for stdin')
+        parser.add_argument('--user', required=True, help='Email of the user the recipes belong to')
+        parser.add_argument('--format', dest='input_format', choices=('csv', 'ndjson'))
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--separator', default='|', help='Separator of CSV tag and ingredient names')
+        parser.add_argument('--checkpoint', help='Progress file, by default the input path with .checkpoint')
+        parser.add_argument('--resume', action='store_true', help='Skip the records the checkpoint has committed')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+        checkpoint_path = options['checkpoint'] or (None if path == '-' else f'{path}.checkpoint')
+        if options['resume'] and checkpoint_path is None:
+            raise CommandError('--resume needs --checkpoint when reading stdin')
+        checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        state = checkpoint.load() if options['resume'] else {'records': 0, 'created': 0}
+        skip, created, invalid = state['records'], state['created'], 0
+        if skip:
+            self.stdout.write(f'Resuming after {skip} records')
+
+        importer = RecipeImporter(user)
+        fmt = options['input_format'] or input_format(path)
+        batch, records, started = [], 0, time.monotonic()
+        with open_input(path) as stream:
+            rows = read_csv(stream, options['separator']) if fmt == 'csv' else read_ndjson(stream)
+            for records, record in enumerate(rows, 1):
+                if records <= skip:
+                    continue
+                try:
+                    batch.append(clean_record(record))
+                except ValidationError as exc:
+                    invalid += 1
+                    messages = exc.message_dict if hasattr(exc, 'error_dict') else exc.messages
+                    self.stderr.write(f'Record {records}: {messages}')
+
+                if len(batch) == options['batch_size']:
+                    created += self.write(importer, batch, checkpoint, records, created, started, skip)
+                    batch = []
+            created += self.write(importer, batch, checkpoint, records, created, started, skip)
+
+        if checkpoint is not None:
+            checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} recipes, skipped {invalid} invalid records'))
+
+    def write(self, importer, batch, checkpoint, records, created, started, skip):
+        """Commit ``batch``, save the checkpoint and report progress"""
+        count = importer.import_batch(batch) if batch else 0
+        if checkpoint is not None:
+            checkpoint.save({'records': records, 'created': created + count})
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f'{records} records read, {created + count} recipes imported, '
+                          f'{(records - skip) / elapsed:.0f} records/sec')
+        return count
@@ -0,0 +1,99 @@
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_PATHS = ('/api/recipe/recipes/', '/api/recipe/tags/', '/api/recipe/ingredients/')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Send concurrent GET requests to a running server and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--compare', action='append', default=[], metavar='BASE_URL',
+                            help='Run the same requests against this server too, e.g. the ASGI one, '
+                                 'and report its req/s and p99 against --base-url. Repeatable.')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request, repeatable. Defaults to the recipe, tag and ingredient lists.')
+        parser.add_argument('--token', help='API token sent as "Authorization: Token <token>"')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per path')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per path')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def fetch(self, url, headers, timeout):
+        """``(seconds, error)`` of one request, the body read in full"""
+        request = urllib.request.Request(url, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+            error = None
+        except urllib.error.HTTPError as exc:
+            error = f'HTTP {exc.code}'
+        except OSError as exc:
+            error = str(exc)
+        return time.perf_counter() - started, error
+
+    def run(self, url, headers, options):
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(lambda _: self.fetch(url, headers, options['timeout']), range(options['warmup'])))
+            started = time.perf_counter()
+            results = list(executor.map(
+                lambda _: self.fetch(url, headers, options['timeout']), range(options['requests']),
+            ))
+            elapsed = time.perf_counter() - started
+        return results, elapsed
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+
+        summaries = []
+        for base_url in [options['base_url']] + options['compare']:
+            if options['compare']:
+                self.stdout.write(base_url)
+            summaries.append(self.report(base_url, headers, options))
+        baseline = summaries[0]
+        for base_url, summary in zip(options['compare'], summaries[1:]):
+            self.stdout.write(f'{base_url} against {options["base_url"]}')
+            for path, (throughput, p99) in summary.items():
+                base_throughput, base_p99 = baseline[path]
+                self.stdout.write(
+                    f'{path:40} req/s x{throughput / base_throughput:.2f}, '
+                    f'p99 x{(p99 / base_p99 if base_p99 else 0.0):.2f}'
+                )
+
+    def report(self, base_url, headers, options):
+        """Print a row per path and return ``{path: (req/s, p99 ms)}``"""
+        self.stdout.write(f'{"path":40} {"req/s":>8} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"max ms":>8} errors')
+        summary = {}
+        for path in options['paths'] or DEFAULT_PATHS:
+            results, elapsed = self.run(base_url.rstrip('/') + path, headers, options)
+            latencies = sorted(seconds * 1000 for seconds, error in results if error is None)
+            errors = [error for _, error in results if error is not None]
+            summary[path] = (len(results) / elapsed, percentile(latencies, 0.99))
+            self.stdout.write(
+                f'{path:40} {summary[path][0]:8.1f} {percentile(latencies, 0.5):8.1f} '
+                f'{percentile(latencies, 0.9):8.1f} {summary[path][1]:8.1f} '
+                f'{(latencies[-1] if latencies else 0.0):8.1f} {len(errors)}'
+            )
+            if errors:
+                self.stderr.write(f'  first error: {errors[0]}')
+        return summary
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.dedupe import merge_duplicate_names
+from core.events import recipes_changed
+from core.models import Ingredient, Recipe, Tag
+
+
+class Command(BaseCommand):
+    help = 'Merge tags and ingredients whose names only differ in case'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in (Tag, Ingredient):
+            removed, affected = merge_duplicate_names(model, batch_size=options['batch_size'])
+            for user_id, recipe_ids in affected.items():
+                recipes_changed.send(sender=Recipe, user_id=user_id, recipe_ids=sorted(recipe_ids))
+            recipes = sum(len(recipe_ids) for recipe_ids in affected.values())
+            self.stdout.write(f'{model._meta.verbose_name_plural}: removed {removed} duplicates, relinked {recipes} recipes')
+        self.stdout.write(self.style.SUCCESS('Duplicates merged!'))
@@ -1,19 +1,67 @@
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
+    help = 'Wait until the databases answer a query, backing off between attempts'
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='databases',
+                            help='Alias to wait for, repeatable. Defaults to every configured database.')
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait overall')
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5)
+
+    def probe(self, alias):
+        """Open a connection to ``alias`` and run a query on it"""
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        finally:
+            # Every attempt starts on a fresh connection, and the waiting
+            # thread does not keep one open once it is done.
+            connection.close()
+
+    def wait_for(self, alias, deadline, initial_delay, max_delay):
+        """Probe ``alias`` until it answers, returning ``(attempts, seconds)``"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                self.probe(alias)
+                return attempt, time.monotonic() - started
+            except OperationalError as exc:
+                # Full jitter keeps several waiting containers from retrying in step.
+                delay = random.uniform(0, min(max_delay, initial_delay * 2 ** (attempt - 1)))
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(f'Database {alias} unavailable after {attempt} attempts: {exc}')
+                self.stdout.write(f'Database {alias} unavailable, waiting {delay:.2f} seconds...')
+                time.sleep(min(delay, remaining))
+
+    def handle(self, *args, **options):
+        aliases = options['databases'] or list(connections.databases)
+        unknown = sorted(set(aliases) - set(connections.databases))
+        if unknown:
+            raise CommandError(f'Unknown database alias: {", ".join(unknown)}')
+
+        self.stdout.write('Waiting for database...')
+        deadline = time.monotonic() + options['timeout']
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            futures = {
+                alias: executor.submit(
+                    self.wait_for, alias, deadline, options['initial_delay'], options['max_delay'],
+                ) for alias in aliases
+            }
+            for alias, future in futures.items():
+                attempts, elapsed = future.result()
+                self.stdout.write(f'Database {alias} ready after {attempts} attempts in {elapsed:.3f}s')
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,81 @@
+# Generated by Django 3.0.8 on 2026-10-18 20:40
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_search_vector(apps, schema_editor):
+    """Add and fill the tsvector column on PostgreSQL, or the terms elsewhere"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE core_recipe ADD COLUMN search_vector tsvector')
+        schema_editor.execute(
+            'CREATE INDEX core_recipe_search_vector_gin ON core_recipe USING GIN (search_vector)'
+        )
+        schema_editor.execute("""
+            UPDATE core_recipe SET search_vector =
+                setweight(to_tsvector('english', core_recipe.title), 'A') ||
+                setweight(to_tsvector('english', concat_ws(' ',
+                    (SELECT string_agg(t.name, ' ') FROM core_tag t
+                     JOIN core_recipe_tags rt ON rt.tag_id = t.id WHERE rt.recipe_id = core_recipe.id),
+                    (SELECT string_agg(i.name, ' ') FROM core_ingredient i
+                     JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id WHERE ri.recipe_id = core_recipe.id)
+                )), 'B')
+        """)
+        return
+
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeSearchTerm = apps.get_model('core', 'RecipeSearchTerm')
+    recipes = Recipe.objects.order_by('id').prefetch_related('tags', 'ingredients')
+    last_id = 0
+    while True:
+        batch = list(recipes.filter(id__gt=last_id)[:2000])
+        if not batch:
+            break
+        rows = []
+        for recipe in batch:
+            weights = Counter()
+            for term in re.findall(r'\w+', recipe.title.lower()):
+                weights[term[:64]] += 4
+            for related in list(recipe.tags.all()) + list(recipe.ingredients.all()):
+                for term in re.findall(r'\w+', related.name.lower()):
+                    weights[term[:64]] += 1
+            rows.extend(
+                RecipeSearchTerm(recipe_id=recipe.id, user_id=recipe.user_id, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+        RecipeSearchTerm.objects.bulk_create(rows)
+        last_id = batch[-1].id
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE core_recipe DROP COLUMN search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_collection_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='core.Recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='recipesearchterm',
+            index=models.Index(fields=['user', 'term', 'recipe'], name='core_search_user_term'),
+        ),
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
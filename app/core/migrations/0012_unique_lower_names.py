@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from core.dedupe import merge_duplicate_names
+
+
+def merge_duplicates(apps, schema_editor):
+    for model_name in ('Tag', 'Ingredient'):
+        merge_duplicate_names(apps.get_model('core', model_name), using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+    """Make tag and ingredient names unique per user, ignoring case
+
+    Existing duplicates are merged first, otherwise the unique indexes could
+    not be built.
+    """
+
+    dependencies = [
+        ('core', '0011_recipe_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_tag_user_lower_name_uniq ON core_tag (user_id, LOWER(name))',
+            'DROP INDEX core_tag_user_lower_name_uniq',
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_ingredient_user_lower_name_uniq ON core_ingredient (user_id, LOWER(name))',
+            'DROP INDEX core_ingredient_user_lower_name_uniq',
+        ),
+    ]
@@ -1,9 +1,14 @@
 import os
 import uuid
 
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.functions import Coalesce, Lower
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
+from django.utils import timezone
+
+from core import hashing
+from core.events import attrs_created, recipes_changed
 
 
 def recipe_image_file_path(instance, filename):
@@ -42,6 +47,105 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Check on the hashing executor, rehashing when the hasher settings changed"""
+        valid, rehash = hashing.check_password(raw_password, self.password)
+        if rehash:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return valid
+
+
+class RevokedToken(models.Model):
+    """A signed auth token revoked before it expired
+
+    Rows are only needed until ``expires_at``, when the token would be
+    refused anyway.
+    """
+    jti = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class RecipeAttrQuerySet(models.QuerySet):
+    """Queries shared by the objects recipes are tagged with"""
+
+    def _recipe_links(self):
+        """Through table rows linking the outer row to its recipes"""
+        field = self.model._meta.get_field('recipe').field
+        target = f'{field.m2m_reverse_field_name()}_id'
+        links = field.remote_field.through.objects.filter(**{target: models.OuterRef('pk')})
+        return links, target
+
+    def assigned(self):
+        links, _ = self._recipe_links()
+        return self.filter(models.Exists(links))
+
+    def with_recipe_counts(self):
+        links, target = self._recipe_links()
+        counts = links.values(target).annotate(count=models.Count('id')).values('count')
+        return self.annotate(recipe_count=Coalesce(models.Subquery(counts), 0))
+
+    def with_names(self, user, names):
+        """Rows of ``user`` named like any of ``names``, ignoring case
+
+        Both sides go through the database's ``LOWER`` so the lookup agrees
+        with, and is served by, the unique ``(user_id, LOWER(name))`` index.
+        """
+        lowered = [Lower(models.Value(name)) for name in names]
+        return self.annotate(lower_name=Lower('name')).filter(user=user, lower_name__in=lowered)
+
+    def get_or_create_name(self, user, name):
+        """Return ``(obj, created)`` for ``name``, safe against concurrent inserts"""
+        obj = self.with_names(user, [name]).first()
+        if obj is not None:
+            return obj, False
+        try:
+            with transaction.atomic(using=self.db):
+                return self.create(user=user, name=name), True
+        except IntegrityError:
+            return self.with_names(user, [name]).get(), False
+
+    def upsert_names(self, user, names):
+        """Create whatever is missing and return one object per name, in order
+
+        The insert skips names that already exist or that a concurrent
+        request just created (``ON CONFLICT DO NOTHING``), so the same batch
+        can be sent any number of times.
+        """
+        lowered = self.lower_names(names)
+        unique = list({lowered[name]: name for name in reversed(names)}.values())
+        found = {obj.lower_name: obj for obj in self.with_names(user, unique)}
+        missing = [name for name in unique if lowered[name] not in found]
+        if missing:
+            self.bulk_create([self.model(user=user, name=name) for name in missing], ignore_conflicts=True)
+            found.update((obj.lower_name, obj) for obj in self.with_names(user, missing))
+            attrs_created.send(sender=self.model, user_id=user.pk)
+        return [found[lowered[name]] for name in names]
+
+    def lower_names(self, names, batch_size=500):
+        """Map each of ``names`` to the database's ``LOWER`` of it
+
+        Python's ``str.lower`` disagrees with the database outside ASCII, so
+        names are only ever compared in the form the unique index uses.
+        """
+        names = list(dict.fromkeys(names))
+        lowered = {}
+        with connections[self.db].cursor() as cursor:
+            for start in range(0, len(names), batch_size):
+                batch = names[start:start + batch_size]
+                cursor.execute('SELECT ' + ', '.join(['LOWER(%s)'] * len(batch)), batch)
+                lowered.update(zip(batch, cursor.fetchone()))
+        return lowered
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=255)
@@ -49,6 +153,14 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name'], name='core_tag_user_name'),
+        ]
 
     def __str__(self):
         return self.name
@@ -57,12 +169,125 @@ class Tag(models.Model):
 class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name'], name='core_ingredient_user_name'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def filter_related(self, relation, ids, match_all=False):
+        """Keep recipes linked to any (or all) of ``ids`` through ``relation``
+
+        The match runs against the M2M through table in a subquery instead of
+        joining it, so a recipe matching several ids is still returned once.
+        """
+        field = self.model._meta.get_field(relation)
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        ids = set(ids)
+        links = field.remote_field.through.objects.filter(**{f'{target}__in': ids})
+
+        if not match_all:
+            return self.filter(models.Exists(links.filter(**{source: models.OuterRef('pk')})))
+
+        matched = links.values(source).annotate(
+            matched=models.Count(target),
+        ).filter(matched=len(ids)).values(source)
+        return self.filter(pk__in=matched)
+
+    def with_relations(self, relations):
+        """Prefetch the given M2M relations, loading only the listed fields
+
+        ``relations`` maps a relation name (``tags``/``ingredients``) to the
+        fields the caller needs from it, so every relation costs exactly one
+        extra query no matter how many recipes are fetched.
+        """
+        lookups = []
+        for name, fields in relations.items():
+            related_model = self.model._meta.get_field(name).related_model
+            lookups.append(models.Prefetch(
+                name,
+                queryset=related_model.objects.only(*fields),
+            ))
+        return self.prefetch_related(*lookups)
+
+    def bulk_create_with_relations(self, recipes, relations):
+        """Insert ``recipes`` and their M2M links in a fixed number of statements
+
+        ``relations`` holds one ``{relation name: [ids]}`` mapping per recipe.
+        SQLite cannot return primary keys from a bulk insert, but it keeps
+        other writers out until the transaction ends, so the new rows are the
+        ones with the highest ids. Other such backends fall back to saving the
+        rows one by one so the links can still be written.
+        """
+        connection = connections[self.db]
+        with transaction.atomic(using=self.db):
+            if connection.features.can_return_rows_from_bulk_insert:
+                self.bulk_create(recipes)
+            elif connection.vendor == 'sqlite' and recipes:
+                self.bulk_create(recipes)
+                ids = self.model._default_manager.using(self.db).order_by('-id').values_list('id', flat=True)
+                for recipe, pk in zip(recipes, reversed(ids[:len(recipes)])):
+                    recipe.pk = pk
+                    recipe._state.adding, recipe._state.db = False, self.db
+            else:
+                for recipe in recipes:
+                    recipe.save(using=self.db)
+            self.bulk_set_relations(zip(recipes, relations), replace=False)
+        return recipes
+
+    def bulk_set_relations(self, pairs, replace=True):
+        """Write the M2M links of many recipes with one statement per table
+
+        ``pairs`` yields ``(recipe, {relation name: [ids]})``. With
+        ``replace`` the current links of every relation that is present are
+        removed first, mirroring ``RelatedManager.set()``. ``recipes_changed``
+        is sent once per user in place of the ``m2m_changed`` signals.
+        """
+        links, recipe_ids_by_user = {}, {}
+        for recipe, relations in pairs:
+            recipe_ids_by_user.setdefault(recipe.user_id, []).append(recipe.pk)
+            for name, ids in relations.items():
+                links.setdefault(name, {})[recipe.pk] = set(ids)
+
+        for name, ids_by_recipe in links.items():
+            field = self.model._meta.get_field(name)
+            through = field.remote_field.through
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            if replace:
+                through.objects.using(self.db).filter(**{f'{source}__in': list(ids_by_recipe)}).delete()
+            through.objects.using(self.db).bulk_create([
+                through(**{source: recipe_id, target: related_id})
+                for recipe_id, related_ids in ids_by_recipe.items()
+                for related_id in related_ids
+            ])
+
+        for user_id, recipe_ids in recipe_ids_by_user.items():
+            recipes_changed.send(sender=self.model, user_id=user_id, recipe_ids=recipe_ids)
+
+
 class Recipe(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_PROCESSING, 'Processing'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     time_minutes = models.IntegerField()
@@ -71,6 +296,91 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(max_length=16, choices=IMAGE_STATUS_CHOICES, blank=True, default='')
+    image_thumbnail = models.ImageField(null=True, blank=True, upload_to=recipe_image_file_path)
+    image_medium = models.ImageField(null=True, blank=True, upload_to=recipe_image_file_path)
+    image_webp = models.ImageField(null=True, blank=True, upload_to=recipe_image_file_path)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='core_recipe_user_id_desc'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeSearchTerm(models.Model):
+    """One word of a recipe's title, tag names or ingredient names
+
+    The search index on databases without full text search. ``weight`` adds
+    up how often and where the word occurs, titles counting the most.
+    """
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='search_terms')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'term', 'recipe'], name='core_search_user_term'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class CollectionVersionManager(models.Manager):
+
+    def bump(self, user_id, *collections):
+        """Record that the given collections of a user changed"""
+        now = timezone.now()
+        for collection in collections:
+            rows = self.filter(user_id=user_id, collection=collection)
+            if rows.update(version=models.F('version') + 1, updated_at=now):
+                continue
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(user_id=user_id, collection=collection, version=1, updated_at=now)
+            except IntegrityError:
+                rows.update(version=models.F('version') + 1, updated_at=now)
+
+    def for_user(self, user_id, collections):
+        """Return ``{collection: (version, updated_at)}`` in a single query"""
+        rows = self.filter(user_id=user_id, collection__in=collections)
+        versions = {collection: (0, None) for collection in collections}
+        for collection, version, updated_at in rows.values_list('collection', 'version', 'updated_at'):
+            versions[collection] = (version, updated_at)
+        return versions
+
+
+class CollectionVersion(models.Model):
+    """Per user counter that changes whenever one of its collections does
+
+    Readers compare versions instead of scanning the collection to find out
+    whether anything changed.
+    """
+    RECIPES = 'recipes'
+    TAGS = 'tags'
+    INGREDIENTS = 'ingredients'
+    COLLECTION_CHOICES = (
+        (RECIPES, 'Recipes'),
+        (TAGS, 'Tags'),
+        (INGREDIENTS, 'Ingredients'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    collection = models.CharField(max_length=16, choices=COLLECTION_CHOICES)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    objects = CollectionVersionManager()
+
+    class Meta:
+        unique_together = ('user', 'collection')
+
+    def __str__(self):
+        return f'{self.collection} v{self.version}'
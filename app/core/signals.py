@@ -0,0 +1,53 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.events import attrs_created, recipes_changed
+from core.models import CollectionVersion, Ingredient, Recipe, RecipeSearchTerm, Tag, User
+
+
+COLLECTIONS = {
+    Recipe: CollectionVersion.RECIPES,
+    Tag: CollectionVersion.TAGS,
+    Ingredient: CollectionVersion.INGREDIENTS,
+}
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_collection_version(sender, instance, **kwargs):
+    CollectionVersion.objects.bump(instance.user_id, COLLECTIONS[sender])
+
+
+@receiver(post_delete, sender=User)
+def delete_user_derived_rows(sender, instance, **kwargs):
+    """Drop the rows the cascade itself wrote back for the deleted user
+
+    Deleting a user deletes their recipes, tags and ingredients first, and
+    the signals of those bump the user's versions and reindex their
+    recipes. Foreign keys are only checked at commit, so removing the rows
+    here, still inside the delete's transaction, is enough.
+    """
+    CollectionVersion.objects.filter(user_id=instance.pk).delete()
+    RecipeSearchTerm.objects.filter(user_id=instance.pk).delete()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_recipe_links_version(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        CollectionVersion.objects.bump(instance.user_id, CollectionVersion.RECIPES)
+
+
+@receiver(recipes_changed)
+def bump_changed_recipes_version(sender, user_id, **kwargs):
+    CollectionVersion.objects.bump(user_id, CollectionVersion.RECIPES)
+
+
+@receiver(attrs_created, sender=Tag)
+@receiver(attrs_created, sender=Ingredient)
+def bump_created_attrs_version(sender, user_id, **kwargs):
+    CollectionVersion.objects.bump(user_id, COLLECTIONS[sender])
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.cache import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_get_and_set(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_least_recently_used_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    @patch('core.cache.time.monotonic')
+    def test_expired_entry_missing(self, monotonic):
+        monotonic.return_value = 100
+        cache = LRUCache(ttl=10)
+        cache.set('a', 1)
+
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_delete_many(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        cache.delete_many(['a', 'missing'])
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
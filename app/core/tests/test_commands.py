@@ -1,21 +1,256 @@
+import json
+import os
+import tempfile
 from unittest.mock import patch
 
+from io import StringIO
+
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.management.commands.loadtest import percentile
+from core.models import Ingredient, Recipe, Tag
+
+from recipe.tests.test_tags import use_unicode_lower
+
 
 class CommandTests(TestCase):
 
     def test_wait_for_db_ready(self):
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        out = StringIO()
+
+        call_command('wait_for_db', stdout=out)
+
+        self.assertIn('Database default ready after 1 attempts', out.getvalue())
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError]*5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch('core.management.commands.wait_for_db.Command.probe') as probe:
+            probe.side_effect = [OperationalError]*5 + [None]
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(probe.call_count, 6)
+            self.assertEqual(ts.call_count, 5)
+
+    @patch('random.uniform', side_effect=lambda low, high: high)
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_backs_off(self, ts, uniform):
+        with patch('core.management.commands.wait_for_db.Command.probe') as probe:
+            probe.side_effect = [OperationalError]*5 + [None]
+            call_command('wait_for_db', initial_delay=1, max_delay=10, stdout=StringIO())
+
+        self.assertEqual([call.args[0] for call in ts.call_args_list], [1, 2, 4, 8, 10])
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        with patch('core.management.commands.wait_for_db.Command.probe', side_effect=OperationalError('refused')):
+            with self.assertRaisesMessage(CommandError, 'Database default unavailable after 1 attempts: refused'):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+    def test_wait_for_db_probes_every_alias(self):
+        with patch('core.management.commands.wait_for_db.Command.probe') as probe:
+            call_command('wait_for_db', databases=['default'], stdout=StringIO())
+
+        probe.assert_called_once_with('default')
+
+    def test_wait_for_db_unknown_alias(self):
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', databases=['replica'], stdout=StringIO())
+
+
+class MergeDuplicateNamesTests(TestCase):
+
+    def setUp(self):
+        # Rows from before the unique index existed; dropping it is undone
+        # with the rest of the test transaction.
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX core_tag_user_lower_name_uniq')
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+
+    def test_merge_duplicate_tags(self):
+        salt = Tag.objects.create(user=self.user, name='Salt')
+        copies = [Tag.objects.create(user=self.user, name=name) for name in ('salt', 'SALT')]
+        other_user = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        other = Tag.objects.create(user=other_user, name='salt')
+        recipe1 = Recipe.objects.create(user=self.user, title='Pav Bhaji', time_minutes=5, price=5)
+        recipe2 = Recipe.objects.create(user=self.user, title='Vada Pav', time_minutes=5, price=5)
+        recipe1.tags.add(salt, copies[0])
+        recipe2.tags.add(copies[1])
+        Ingredient.objects.create(user=self.user, name='Onion')
+
+        out = StringIO()
+        call_command('merge_duplicate_names', stdout=out)
+
+        self.assertEqual(set(Tag.objects.values_list('id', flat=True)), {salt.id, other.id})
+        self.assertEqual(list(recipe1.tags.all()), [salt])
+        self.assertEqual(list(recipe2.tags.all()), [salt])
+        self.assertIn('removed 2 duplicates', out.getvalue())
+
+
+class ImportRecipesTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w') as fp:
+            fp.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_recipes', path, user='sahil@sahil.com', stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        Tag.objects.create(user=self.user, name='Spicy')
+        path = self.write('recipes.ndjson', '\n'.join(json.dumps(record) for record in [
+            {'title': 'Pav Bhaji', 'time_minutes': 10, 'price': '5.00', 'tags': ['spicy', 'Street Food'],
+             'ingredients': [{'id': 99, 'name': 'Potato'}]},
+            {'title': 'Vada Pav', 'time_minutes': 5, 'price': 2.5, 'tags': ['Street Food']},
+        ]))
+
+        out, err = self.run_import(path, batch_size=1)
+
+        self.assertIn('Imported 2 recipes', out)
+        self.assertEqual(err, '')
+        pav_bhaji = Recipe.objects.get(title='Pav Bhaji')
+        self.assertEqual(sorted(tag.name for tag in pav_bhaji.tags.all()), ['Spicy', 'Street Food'])
+        self.assertEqual([ingredient.name for ingredient in pav_bhaji.ingredients.all()], ['Potato'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(str(Recipe.objects.get(title='Vada Pav').price), '2.50')
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_import_csv(self):
+        path = self.write('recipes.csv', 'title,time_minutes,price,tags,ingredients\n'
+                                         'Pav Bhaji,10,5.00,Spicy|Street Food,Potato\n'
+                                         '"Misal, Pav",15,4.00,,\n')
+
+        self.run_import(path)
+
+        self.assertEqual(Recipe.objects.get(title='Pav Bhaji').tags.count(), 2)
+        self.assertEqual(Recipe.objects.get(title='Misal, Pav').tags.count(), 0)
+
+    def test_import_non_ascii_names(self):
+        use_unicode_lower(self)
+        tag = Tag.objects.create(user=self.user, name='istanbul')
+        path = self.write('recipes.ndjson', json.dumps(
+            {'title': 'Simit', 'time_minutes': 10, 'price': '1.00', 'tags': ['İSTANBUL', 'Çay', 'ÇAY']},
+        ))
+
+        _, err = self.run_import(path)
+
+        self.assertEqual(err, '')
+        self.assertIn(tag, Recipe.objects.get(title='Simit').tags.all())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_records_reported(self):
+        path = self.write('recipes.ndjson', '{"title": "Pav Bhaji", "time_minutes": 10, "price": "5.00"}\n'
+                                            '{"title": "", "time_minutes": "soon", "price": "5.00"}\n'
+                                            'not json\n'
+                                            '{"title": "Vada Pav", "time_minutes": 5, "price": "1234.00"}\n')
+
+        out, err = self.run_import(path)
+
+        self.assertIn('Imported 1 recipes, skipped 3 invalid records', out)
+        self.assertIn('Record 2:', err)
+        self.assertIn('Record 3: [\'Invalid JSON', err)
+        self.assertIn('Record 4:', err)
+        self.assertEqual(list(Recipe.objects.values_list('title', flat=True)), ['Pav Bhaji'])
+
+    def test_resume_skips_committed_records(self):
+        path = self.write('recipes.ndjson', ''.join(
+            json.dumps({'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00'}) + '\n' for i in range(5)
+        ))
+        with open(f'{path}.checkpoint', 'w') as fp:
+            json.dump({'records': 3, 'created': 3}, fp)
+
+        out, _ = self.run_import(path, resume=True)
+
+        self.assertIn('Resuming after 3 records', out)
+        self.assertIn('Imported 5 recipes', out)
+        self.assertEqual(sorted(Recipe.objects.values_list('title', flat=True)), ['Recipe 3', 'Recipe 4'])
+
+    def test_checkpoint_kept_after_failure(self):
+        path = self.write('recipes.ndjson', ''.join(
+            json.dumps({'title': f'Recipe {i}', 'time_minutes': i, 'price': '1.00', 'tags': [f'Tag {i}']}) + '\n'
+            for i in range(4)
+        ))
+
+        with patch('core.models.RecipeQuerySet.bulk_create_with_relations', side_effect=[[], OperationalError]):
+            with self.assertRaises(OperationalError):
+                self.run_import(path, batch_size=2)
+
+        with open(f'{path}.checkpoint') as fp:
+            self.assertEqual(json.load(fp), {'records': 2, 'created': 2})
+        self.assertFalse(Tag.objects.filter(name='Tag 2').exists())
+
+    def test_unknown_user(self):
+        path = self.write('recipes.ndjson', '')
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@sahil.com', stdout=StringIO())
+
+
+class LoadTestTests(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_report(self):
+        results = [(seconds / 1000, None) for seconds in range(1, 100)] + [(0.5, 'HTTP 500')]
+        out, err = StringIO(), StringIO()
+
+        with patch('core.management.commands.loadtest.Command.fetch', side_effect=[(0, None)] * 5 + results) as fetch:
+            call_command('loadtest', path=['/api/recipe/recipes/'], token='abc', requests=100, warmup=5,
+                         concurrency=1, stdout=out, stderr=err)
+
+        url, headers, _ = fetch.call_args.args
+        self.assertEqual(url, 'http://localhost:8000/api/recipe/recipes/')
+        self.assertEqual(headers['Authorization'], 'Token abc')
+        row = out.getvalue().splitlines()[1].split()
+        self.assertEqual(row[0], '/api/recipe/recipes/')
+        self.assertEqual(row[2:], ['50.0', '90.0', '99.0', '99.0', '1'])
+        self.assertIn('HTTP 500', err.getvalue())
+
+    def test_compare(self):
+        out = StringIO()
+        fast, slow = (0.01, None), (0.04, None)
+
+        with patch('core.management.commands.loadtest.Command.fetch', side_effect=[slow] * 4 + [fast] * 4):
+            call_command('loadtest', path=['/api/recipe/tags/'], compare=['http://localhost:8001'], requests=4,
+                         warmup=0, concurrency=1, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'http://localhost:8000')
+        self.assertEqual(lines[3], 'http://localhost:8001')
+        self.assertEqual(lines[6], 'http://localhost:8001 against http://localhost:8000')
+        self.assertIn('p99 x0.25', lines[7])
+
+
+class BenchmarkHashingTests(TestCase):
+
+    def test_report_per_pool_size(self):
+        out = StringIO()
+
+        call_command('benchmark_hashing', workers='1,2', logins=4, concurrency=2, stdout=out)
+
+        rows = [line.split() for line in out.getvalue().splitlines()[2:]]
+        self.assertEqual([row[0] for row in rows], ['1', '2'])
+        self.assertEqual([row[-1] for row in rows], ['0', '0'])
+
+    def test_invalid_workers(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_hashing', workers='many', stdout=StringIO())
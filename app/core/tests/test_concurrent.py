@@ -0,0 +1,48 @@
+import threading
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.db.concurrent import QueryExecutor, get_query_executor, reset_query_executor, run_queries
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+class QueryExecutorTests(SimpleTestCase):
+
+    def tearDown(self):
+        reset_query_executor()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_query_executor())
+        self.assertEqual(run_queries([thread_name, thread_name]), [thread_name()] * 2)
+
+    def test_runs_on_worker_threads_in_order(self):
+        executor = QueryExecutor(2)
+        try:
+            results = executor.map([lambda: 1, thread_name, lambda: 3])
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(results[0], 1)
+        self.assertTrue(results[1].startswith('db-query'))
+        self.assertEqual(results[2], 3)
+
+    def test_single_query_runs_inline(self):
+        executor = QueryExecutor(2)
+        try:
+            self.assertEqual(executor.map([thread_name]), [thread_name()])
+        finally:
+            executor.shutdown()
+
+
+class QueryExecutorTransactionTests(TestCase):
+
+    @override_settings(DB_CONCURRENT_QUERY_WORKERS=2)
+    def test_runs_inline_inside_transaction(self):
+        reset_query_executor()
+        try:
+            self.assertEqual(run_queries([thread_name, thread_name]), [thread_name()] * 2)
+        finally:
+            reset_query_executor()
@@ -0,0 +1,83 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import hashing
+from core.hashing import HashingBusy, HashingExecutor
+
+
+class HashingExecutorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.executor = HashingExecutor(workers=1, max_queue=1, queue_wait=0.01)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_runs_on_worker_thread(self):
+        name = self.executor.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith('password-hashing'))
+
+    def test_rejects_when_queue_full(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        callers = [threading.Thread(target=self.executor.run, args=(block,)) for _ in range(2)]
+        for caller in callers:
+            caller.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(HashingBusy):
+                self.executor.run(lambda: None)
+        finally:
+            release.set()
+            for caller in callers:
+                caller.join()
+
+        self.assertEqual(self.executor.stats()['rejected'], 1)
+        self.assertIsNone(self.executor.run(lambda: None))
+
+    def test_nested_call_runs_inline(self):
+        executor = HashingExecutor(workers=1, max_queue=0, queue_wait=0.01)
+        try:
+            name = executor.run(lambda: executor.run(lambda: threading.current_thread().name))
+        finally:
+            executor.shutdown()
+
+        self.assertTrue(name.startswith('password-hashing'))
+
+
+class UserPasswordTests(TestCase):
+
+    def setUp(self):
+        hashing.reset_hashing_executor()
+
+    def tearDown(self):
+        hashing.reset_hashing_executor()
+
+    def test_password_hashed_on_executor(self):
+        user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+
+        self.assertTrue(user.check_password('sahil123'))
+        self.assertFalse(user.check_password('wrong'))
+        self.assertEqual(hashing.get_hashing_executor().stats()['submitted'], 3)
+
+    def test_rehash_when_hasher_changes(self):
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.assertTrue(user.password.startswith('md5$'))
+
+        with override_settings(PASSWORD_HASHERS=[
+            'django.contrib.auth.hashers.SHA1PasswordHasher',
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+        ]):
+            self.assertTrue(user.check_password('sahil123'))
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('sha1$'))
+            self.assertTrue(user.check_password('sahil123'))
@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+
+class ServeMediaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.media_root.name, 'uploads', 'recipe'))
+        with open(os.path.join(self.media_root.name, 'uploads', 'recipe', 'a b.jpg'), 'wb') as f:
+            f.write(b'jpeg bytes')
+        settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(self.media_root.cleanup)
+
+    def test_streams_file(self):
+        res = self.client.get('/media/uploads/recipe/a b.jpg')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'jpeg bytes')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        res = self.client.get('/media/uploads/recipe/a b.jpg')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Accel-Redirect'], '/protected-media/uploads/recipe/a%20b.jpg')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res.content, b'')
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_missing_file(self):
+        self.assertEqual(self.client.get('/media/uploads/recipe/missing.jpg').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_path_outside_media_root(self):
+        self.assertEqual(self.client.get('/media/../../etc/passwd').status_code, 404)
+        self.assertEqual(self.client.get('/media/uploads/../../../etc/passwd').status_code, 404)
@@ -1,9 +1,10 @@
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import CollectionVersion, RecipeSearchTerm, Tag, Ingredient, Recipe
 from core import models
 
 
@@ -56,6 +57,22 @@ class ModelTest(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
+    def test_tag_names_unique_ignoring_case(self):
+        user = sample_user()
+        models.Tag.objects.create(user=user, name='Vegan')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            models.Tag.objects.create(user=user, name='VEGAN')
+
+    def test_get_or_create_name(self):
+        user = sample_user()
+        ingredient, created = models.Ingredient.objects.get_or_create_name(user, 'Onion')
+        again, created_again = models.Ingredient.objects.get_or_create_name(user, 'onion')
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again, ingredient)
+
     def test_recipe_str(self):
         recipe = Recipe(
             user=sample_user(),
@@ -74,3 +91,22 @@ class ModelTest(TestCase):
 
         expected_path = f'uploads/recipe/{uuid}.jpg'
         self.assertEqual(file_path, expected_path)
+
+
+class UserDeleteTests(TransactionTestCase):
+    """Foreign keys are only checked at commit, so this needs real transactions"""
+
+    def test_delete_user_with_collections(self):
+        user = sample_user()
+        other = sample_user(email='other@sahil.com')
+        recipe = Recipe.objects.create(user=user, title='Pav Bhaji', time_minutes=5, price=5.00)
+        recipe.tags.add(Tag.objects.create(user=user, name='Spicy'))
+        recipe.ingredients.add(Ingredient.objects.create(user=user, name='Potato'))
+        Tag.objects.create(user=other, name='Sweet')
+
+        user.delete()
+
+        self.assertFalse(get_user_model().objects.filter(pk=user.pk).exists())
+        self.assertFalse(CollectionVersion.objects.filter(user_id=user.pk).exists())
+        self.assertFalse(RecipeSearchTerm.objects.filter(user_id=user.pk).exists())
+        self.assertTrue(CollectionVersion.objects.filter(user=other).exists())
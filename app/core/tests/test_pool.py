@@ -0,0 +1,183 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools, get_pool
+
+
+STATS_URL = reverse('db-pool-stats')
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def pool(self, **options):
+        return ConnectionPool(FakeConnection, **options)
+
+    def test_connection_reused(self):
+        pool = self.pool()
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_discarded_connection_closed(self):
+        pool = self.pool()
+        connection = pool.acquire()
+        pool.release(connection, discard=True)
+
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    @patch('core.db.pool.time.monotonic')
+    def test_max_lifetime(self, monotonic):
+        monotonic.return_value = 100
+        pool = self.pool(max_lifetime=60)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        monotonic.return_value = 161
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+
+    @patch('core.db.pool.time.monotonic')
+    def test_health_check_after_idle(self, monotonic):
+        checked = []
+        monotonic.return_value = 100
+        pool = self.pool(check=checked.append, check_after=30)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(checked, [])
+        pool.release(connection)
+
+        monotonic.return_value = 130
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(checked, [connection])
+
+    def test_failed_health_check_replaces_connection(self):
+        def check(connection):
+            raise OSError('server closed the connection')
+
+        pool = self.pool(check=check, check_after=0)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_failed_reset_discards(self):
+        def reset(connection):
+            raise OSError('rollback failed')
+
+        pool = self.pool(reset=reset)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_wait_timeout(self):
+        pool = self.pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waits_for_released_connection(self):
+        pool = self.pool(max_size=1, timeout=5)
+        connection = pool.acquire()
+        waiting = threading.Event()
+        original_wait = pool._lock.wait
+
+        def wait(timeout):
+            waiting.set()
+            return original_wait(timeout)
+
+        with patch.object(pool._lock, 'wait', side_effect=wait):
+            releaser = threading.Thread(target=lambda: waiting.wait(5) and pool.release(connection))
+            releaser.start()
+            self.assertIs(pool.acquire(), connection)
+            releaser.join()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_time_max'], 0)
+        self.assertEqual(stats['size'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError('connection refused')
+            return FakeConnection()
+
+        pool = ConnectionPool(connect, max_size=1, timeout=0)
+        with self.assertRaises(OSError):
+            pool.acquire()
+
+        self.assertIsInstance(pool.acquire(), FakeConnection)
+
+    def test_clear_closes_idle(self):
+        pool = self.pool()
+        connection = pool.acquire()
+        pool.release(connection)
+
+        pool.clear()
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+
+class DatabasePoolStatsViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def tearDown(self):
+        close_pools()
+
+    def test_requires_admin(self):
+        user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_pool_stats(self):
+        admin = get_user_model().objects.create_superuser(email='admin@sahil.com', password='sahil123')
+        self.client.force_authenticate(admin)
+        pool = get_pool('default test', FakeConnection, max_size=3)
+        pool.release(pool.acquire())
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['default test']['checkouts'], 1)
+        self.assertEqual(res.data['default test']['idle'], 1)
+        self.assertEqual(res.data['default test']['max_size'], 3)
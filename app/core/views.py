@@ -0,0 +1,60 @@
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.views import static
+
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db.pool import pool_stats
+from user.authentication import CachedTokenAuthentication
+
+
+# Uploaded files get a fresh uuid name whenever they change.
+MEDIA_MAX_AGE = 365 * 24 * 3600
+
+
+class DatabasePoolStatsView(APIView):
+    """Size, checkouts and wait times of this process's connection pools"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return Response(pool_stats())
+
+
+def serve_media(request, path):
+    """Serve an uploaded file without the worker reading it
+
+    With ``MEDIA_ACCEL_REDIRECT`` set to an internal nginx location, the
+    response only carries an ``X-Accel-Redirect`` header and nginx sends
+    the file. Otherwise the file is streamed from ``MEDIA_ROOT``, which
+    gunicorn hands to ``sendfile``.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT', None)
+    if prefix:
+        if not os.path.isfile(full_path):
+            raise Http404('File not found')
+        content_type, encoding = mimetypes.guess_type(full_path)
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+    else:
+        response = static.serve(request, path, document_root=settings.MEDIA_ROOT)
+    patch_cache_control(response, public=True, max_age=MEDIA_MAX_AGE, immutable=True)
+    return response
@@ -0,0 +1,52 @@
+"""Production gunicorn settings, picked up from the working directory
+
+Serve WSGI with ``gunicorn app.wsgi:application``, or ASGI with
+``gunicorn app.asgi:application -k uvicorn.workers.UvicornWorker``.
+Every value can be overridden from the environment.
+"""
+import gc
+import os
+
+
+def available_cores():
+    # Honours the CPU set a container is limited to, unlike cpu_count().
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * available_cores() + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# Import Django and every view once in the master; forked workers share
+# those pages copy-on-write instead of each loading its own copy.
+preload_app = True
+
+# Recycle workers after a jittered number of requests so leaks stay
+# bounded and workers do not all restart at once. In-flight requests get
+# ``graceful_timeout`` seconds to finish.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Heartbeat files on tmpfs, so a slow disk cannot get workers killed.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', None)
+errorlog = '-'
+
+
+def pre_fork(server, worker):
+    # A connection opened while preloading would be shared by every worker.
+    from django.db import connections
+    from core.db.pool import close_pools
+
+    connections.close_all()
+    close_pools()
+    # Keep the garbage collector from touching, and so copying, the pages
+    # of objects loaded by the master.
+    gc.freeze()
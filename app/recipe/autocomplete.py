@@ -0,0 +1,62 @@
+import heapq
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+
+from core.cache import LRUCache
+from core.models import CollectionVersion
+
+
+class PrefixIndex:
+    """Names of one user's tags or ingredients sorted for prefix lookups
+
+    A prefix selects a contiguous slice of the sorted, case folded names
+    with two binary searches, and only that slice is ranked by usage.
+    """
+
+    def __init__(self, rows):
+        self.entries = sorted((name.casefold(), name, pk, count) for pk, name, count in rows)
+        self.keys = [entry[0] for entry in self.entries]
+
+    def complete(self, prefix, limit):
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_right(self.keys, prefix + '\U0010ffff')
+        top = heapq.nsmallest(limit, self.entries[start:end], key=lambda entry: (-entry[3], entry[0], entry[2]))
+        return [{'id': pk, 'name': name, 'recipe_count': count} for _, name, pk, count in top]
+
+
+_indexes = None
+
+
+def _get_indexes():
+    global _indexes
+    if _indexes is None:
+        _indexes = LRUCache(maxsize=getattr(settings, 'RECIPE_AUTOCOMPLETE_CACHE_SIZE', 1000))
+    return _indexes
+
+
+def reset_prefix_indexes():
+    global _indexes
+    _indexes = None
+
+
+def get_prefix_index(queryset, user_id, collections):
+    """The ``PrefixIndex`` of ``queryset`` for a user, rebuilt once it is stale
+
+    The index is kept with the versions of ``collections`` it was built
+    from. The model signals move those versions on whenever a name or a
+    recipe link changes, so checking them is the invalidation and costs one
+    query instead of the full grouped count.
+    """
+    indexes = _get_indexes()
+    key = (queryset.model._meta.label, user_id)
+    versions = CollectionVersion.objects.for_user(user_id, collections)
+    entry = indexes.get(key)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+
+    rows = queryset.filter(user_id=user_id).with_recipe_counts().values_list('id', 'name', 'recipe_count')
+    index = PrefixIndex(rows)
+    indexes.set(key, (versions, index))
+    return index
@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from core.models import Recipe
+
+from recipe.serializers import RecipeBulkSerializer, RecipeSerializer, related_prefetch_fields, RECIPE_RELATIONS
+
+
+def _check_size(items):
+    max_items = getattr(settings, 'RECIPE_BULK_MAX_ITEMS', 2000)
+    if not isinstance(items, list) or not items:
+        raise ValidationError({'detail': _('Expected a non empty list of items.')})
+    if len(items) > max_items:
+        raise ValidationError({'detail': _('At most %(max)d items are allowed per request.') % {'max': max_items}})
+
+
+def _validate_items(items, partial=False):
+    """Run the per item validation, which never queries the database"""
+    validated, errors = [], []
+    for item in items:
+        serializer = RecipeBulkSerializer(data=item, partial=partial)
+        if serializer.is_valid():
+            validated.append(serializer.validated_data)
+            errors.append(None)
+        else:
+            validated.append(None)
+            errors.append(serializer.errors)
+    return validated, errors
+
+
+def _check_relations(user, validated, errors):
+    """Check every referenced tag and ingredient id with one query per model"""
+    for name in RECIPE_RELATIONS:
+        wanted = {pk for data in validated if data for pk in data.get(name, ())}
+        if not wanted:
+            continue
+        model = Recipe._meta.get_field(name).related_model
+        known = set(model.objects.filter(user=user, id__in=wanted).values_list('id', flat=True))
+        for index, data in enumerate(validated):
+            if not data:
+                continue
+            missing = sorted(set(data.get(name, ())) - known)
+            if missing:
+                errors[index] = {name: [_('Invalid pk "%(pk)s" - object does not exist.') % {'pk': pk} for pk in missing]}
+                validated[index] = None
+
+
+def _split_relations(data):
+    data = dict(data)
+    data.pop('id', None)
+    relations = {name: data.pop(name) for name in RECIPE_RELATIONS if name in data}
+    return data, relations
+
+
+def _results(pks, errors, success_status):
+    """Pair each input item with its serialized recipe or its errors
+
+    ``pks`` holds the primary key written for every item, or ``None`` when
+    the item failed with the matching entry of ``errors``.
+    """
+    written = [pk for pk in pks if pk is not None]
+    data = {}
+    if written:
+        queryset = Recipe.objects.filter(pk__in=written).with_relations(related_prefetch_fields(RecipeSerializer))
+        data = {item['id']: item for item in RecipeSerializer(queryset, many=True).data}
+
+    results = []
+    for pk, error in zip(pks, errors):
+        if pk is None:
+            results.append({'status': status.HTTP_400_BAD_REQUEST, 'errors': error})
+        else:
+            results.append({'status': success_status, 'data': data[pk]})
+
+    if not written:
+        response_status = status.HTTP_400_BAD_REQUEST
+    elif len(written) < len(results):
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = success_status
+    return {'results': results}, response_status
+
+
+def bulk_create(user, items):
+    """Create every valid recipe in ``items`` and report errors per item"""
+    _check_size(items)
+    validated, errors = _validate_items(items)
+    _check_relations(user, validated, errors)
+
+    recipes, relations = [], []
+    for data in validated:
+        if data:
+            fields, related = _split_relations(data)
+            recipes.append(Recipe(user=user, **fields))
+            relations.append(related)
+
+    Recipe.objects.bulk_create_with_relations(recipes, relations)
+
+    created = iter(recipes)
+    pks = [next(created).pk if data else None for data in validated]
+    return _results(pks, errors, status.HTTP_201_CREATED)
+
+
+def bulk_update(user, items):
+    """Partially update the recipes in ``items``, which must carry their ``id``"""
+    _check_size(items)
+    validated, errors = _validate_items(items, partial=True)
+    for index, data in enumerate(validated):
+        if data and 'id' not in data:
+            errors[index], validated[index] = {'id': [_('This field is required.')]}, None
+    _check_relations(user, validated, errors)
+
+    ids = [data['id'] for data in validated if data]
+    existing = Recipe.objects.filter(user=user, id__in=ids).in_bulk()
+
+    now = timezone.now()
+    recipes, pairs, update_fields = [], [], {'updated_at'}
+    for index, data in enumerate(validated):
+        if not data:
+            continue
+        recipe = existing.get(data['id'])
+        if recipe is None:
+            errors[index], validated[index] = {'id': [_('Not found.')]}, None
+            continue
+        fields, related = _split_relations(data)
+        for name, value in fields.items():
+            setattr(recipe, name, value)
+        recipe.updated_at = now
+        update_fields.update(fields)
+        recipes.append(recipe)
+        pairs.append((recipe, related))
+
+    with transaction.atomic():
+        Recipe.objects.bulk_update(recipes, sorted(update_fields))
+        Recipe.objects.bulk_set_relations(pairs)
+
+    pks = [data['id'] if data else None for data in validated]
+    return _results(pks, errors, status.HTTP_200_OK)
+
+
+def bulk_delete(user, ids):
+    """Delete the user's recipes in ``ids`` and report the ids that were not found"""
+    _check_size(ids)
+    if not all(isinstance(pk, int) for pk in ids):
+        raise ValidationError({'ids': _('Expected a list of integer ids.')})
+
+    queryset = Recipe.objects.filter(user=user, id__in=ids)
+    found = set(queryset.values_list('id', flat=True))
+    queryset.delete()
+    return {'deleted': sorted(found), 'not_found': sorted(set(ids) - found)}
@@ -0,0 +1,133 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import LRUCache
+
+
+class ResponseCache:
+    """Per-user cache of serialized recipe list and detail responses
+
+    Entries live in an in-process LRU, or in the Django cache named by
+    ``RECIPE_RESPONSE_CACHE_ALIAS`` when processes should share them.
+    Bodies hold absolute image URLs, so keys include the scheme and host of
+    the request. Model signals move the generation of the recipes that
+    changed and of the user's lists on, which orphans every cached copy.
+    Each entry also records the collection versions it was built from and
+    is only served while they are still current, so a process that missed
+    an invalidation never serves a stale response.
+    """
+
+    def __init__(self):
+        alias = getattr(settings, 'RECIPE_RESPONSE_CACHE_ALIAS', None)
+        self.ttl = getattr(settings, 'RECIPE_RESPONSE_CACHE_TTL', 300)
+        if alias:
+            self.backend = caches[alias]
+        else:
+            self.backend = LRUCache(maxsize=getattr(settings, 'RECIPE_RESPONSE_CACHE_SIZE', 5000), ttl=self.ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _generation_key(self, user_id, recipe_id=None):
+        if recipe_id is None:
+            return f'recipe-response:{user_id}:generation'
+        return f'recipe-response:{user_id}:detail:{recipe_id}:generation'
+
+    def _bump_generation(self, key):
+        self.backend.set(key, (self.backend.get(key) or 0) + 1, None)
+
+    def list_key(self, user_id, request):
+        generation = self.backend.get(self._generation_key(user_id)) or 0
+        return (
+            f'recipe-response:{user_id}:list:{generation}:'
+            f'{request.scheme}://{request.get_host()}:{request.GET.urlencode()}'
+        )
+
+    def detail_key(self, user_id, recipe_id, request):
+        generation = self.backend.get(self._generation_key(user_id, recipe_id)) or 0
+        return f'recipe-response:{user_id}:detail:{recipe_id}:{generation}:{request.scheme}://{request.get_host()}'
+
+    def get(self, key, versions):
+        entry = self.backend.get(key)
+        if entry is not None and entry[0] == versions:
+            self._count('hits')
+            return entry[1]
+        self._count('misses')
+        return None
+
+    def set(self, key, versions, data):
+        self.backend.set(key, (versions, data), self.ttl)
+
+    def invalidate(self, user_id, recipe_ids=(), lists=True):
+        """Orphan the detail entries of ``recipe_ids`` and, with ``lists``, every list page"""
+        recipe_ids = list(recipe_ids)
+        for recipe_id in recipe_ids:
+            self._bump_generation(self._generation_key(user_id, recipe_id))
+        if lists:
+            self._bump_generation(self._generation_key(user_id))
+        self._count('invalidations', len(recipe_ids) + lists)
+
+    def stats(self):
+        stats = {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+        if isinstance(self.backend, LRUCache):
+            backend_stats = self.backend.stats()
+            stats.update(size=backend_stats['size'], evictions=backend_stats['evictions'])
+        return stats
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def reset_response_cache():
+    global _response_cache
+    _response_cache = None
+
+
+class CachedResponseMixin:
+    """Serve list and retrieve from ``ResponseCache``
+
+    Goes after ``ConditionalGetMixin`` so a 304 is answered before the
+    cache is looked at, and both share the one collection version query.
+    """
+
+    def cached(self, handler, key, request, *args, **kwargs):
+        cache = get_response_cache()
+        versions = self.get_collection_versions(request)
+        data = cache.get(key, versions)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, versions, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        key = get_response_cache().list_key(request.user.pk, request)
+        return self.cached(super().list, key, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Detail entries are dropped by recipe id alone, so only the default
+        # representation is cached.
+        if request.query_params.get('fields') or request.query_params.get('expand'):
+            return super().retrieve(request, *args, **kwargs)
+        recipe_id = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        key = get_response_cache().detail_key(request.user.pk, recipe_id, request)
+        return self.cached(super().retrieve, key, request, *args, **kwargs)
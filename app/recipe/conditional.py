@@ -0,0 +1,64 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core.models import CollectionVersion
+
+
+class ConditionalGetMixin:
+    """Answer conditional list/retrieve requests from the collection versions
+
+    The ETag and Last-Modified validators are derived from the per-user
+    ``CollectionVersion`` rows alone, so a request carrying a current
+    ``If-None-Match`` or ``If-Modified-Since`` gets a 304 after one small
+    query, before the queryset or serializer runs.
+    """
+    version_collections = ()
+
+    def get_version_collections(self):
+        """The collections the response depends on, ``version_collections`` by default"""
+        return self.version_collections
+
+    def get_collection_versions(self, request):
+        """The versions of ``get_version_collections()``, fetched once per request"""
+        if getattr(self, '_collection_versions', None) is None:
+            self._collection_versions = CollectionVersion.objects.for_user(
+                request.user.pk, self.get_version_collections(),
+            )
+        return self._collection_versions
+
+    def get_validators(self, request):
+        versions = self.get_collection_versions(request)
+        key = '|'.join([
+            self.basename,
+            self.action,
+            str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')),
+            request.accepted_renderer.format,
+            request.GET.urlencode(),
+            ','.join(f'{collection}:{versions[collection][0]}' for collection in self.get_version_collections()),
+        ])
+        etag = quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest())
+        timestamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return etag, last_modified
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,55 @@
+from django.conf import settings
+
+from rest_framework.renderers import JSONRenderer
+
+from recipe.flat import compile_plan
+from recipe.serializers import RecipeDetailSerializer, RECIPE_RELATIONS
+
+
+# ``?as=`` value -> (content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'json': ('application/json', 'json'),
+}
+
+
+def export_plan(context=None):
+    """The ``FlatPlan`` of a recipe detail with its tags and ingredients expanded"""
+    return compile_plan(RecipeDetailSerializer(expand=RECIPE_RELATIONS, context=context))
+
+
+def iter_recipes(queryset, plan, request=None, chunk_size=None):
+    """Yield lists of rendered recipes, ``chunk_size`` at a time
+
+    Recipes are read with ``iterator()``, a server-side cursor on
+    PostgreSQL, and the tags and ingredients of every chunk are fetched
+    with one query per relation, so memory is bounded by the chunk size
+    rather than by the number of recipes.
+    """
+    chunk_size = chunk_size or getattr(settings, 'RECIPE_EXPORT_CHUNK_SIZE', 500)
+    chunk = []
+    for row in queryset.values(*plan.columns).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield plan.render(chunk, request)
+            chunk = []
+    if chunk:
+        yield plan.render(chunk, request)
+
+
+def stream_ndjson(chunks):
+    """One JSON document per line"""
+    render = JSONRenderer().render
+    for recipes in chunks:
+        yield b''.join(render(recipe) + b'\n' for recipe in recipes)
+
+
+def stream_json(chunks):
+    """A single JSON array, written a chunk at a time"""
+    render = JSONRenderer().render
+    separator = b'['
+    for recipes in chunks:
+        if recipes:
+            yield separator + b','.join(render(recipe) for recipe in recipes)
+            separator = b','
+    yield b']' if separator == b',' else b'[]'
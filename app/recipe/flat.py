@@ -0,0 +1,228 @@
+import decimal
+from functools import partial
+
+from django.conf import settings
+from django.db.models import FileField as ModelFileField
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from core.cache import LRUCache
+from core.db.concurrent import run_queries
+from core.models import Recipe
+
+from recipe.serializers import RECIPE_RELATIONS
+
+
+# Fields whose ``to_representation`` returns ``int`` and ``str`` values as is.
+PLAIN_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.ReadOnlyField)
+
+_plans = LRUCache(maxsize=256)
+
+
+def _decimal(field):
+    """``DecimalField.to_representation`` that skips quantizing values already at scale"""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize:
+        return field.to_representation
+    exponent = -field.decimal_places
+
+    def render(value):
+        if value is None:
+            return None
+        if isinstance(value, decimal.Decimal) and value.as_tuple().exponent == exponent:
+            return '{:f}'.format(value)
+        return field.to_representation(value)
+    return render
+
+
+def _file(model, source, field):
+    """``FileField.to_representation`` for a stored file name"""
+    storage = model._meta.get_field(source).storage
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def render(name, request):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return render
+
+
+def _field_renderer(model, name, field, flat_fields):
+    """``(columns, render(row, related, request))`` for one field, or ``None``"""
+    if name in flat_fields:
+        columns, render = flat_fields[name]
+        return columns, lambda row, related, request: render(row, request)
+
+    source = field.source
+    if isinstance(field, (serializers.ChoiceField, *PLAIN_FIELDS)):
+        if isinstance(field, serializers.ChoiceField) and any(
+                str(key) != key for key in field.choice_strings_to_values.values()):
+            return None
+        return (source,), lambda row, related, request: row[source]
+    if isinstance(field, serializers.DecimalField):
+        render = _decimal(field)
+        return (source,), lambda row, related, request: render(row[source])
+    if isinstance(field, serializers.FileField) and isinstance(model._meta.get_field(source), ModelFileField):
+        render = _file(model, source, field)
+        return (source,), lambda row, related, request: render(row[source], request)
+    return None
+
+
+class FlatPlan:
+    """A serializer compiled into per-field functions over ``values()`` rows
+
+    Built from the DRF serializer a request would have used, so it renders
+    exactly the same fields, in the same order and with the same values,
+    while skipping model instances and the per-field machinery of
+    ``Serializer.to_representation``.
+    """
+
+    def __init__(self, model, columns, renderers, relations):
+        self.model = model
+        self.columns = columns
+        self.renderers = renderers
+        # relation name -> nested field names, or ``None`` for plain ids
+        self.relations = relations
+
+    @classmethod
+    def compile(cls, serializer):
+        """Compile ``serializer`` or return ``None`` when a field is not supported"""
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        model = serializer.Meta.model
+        flat_fields = getattr(serializer, 'flat_fields', {})
+        columns, renderers, relations = ['id'], [], {}
+        for name, field in serializer.fields.items():
+            if model is Recipe and name in RECIPE_RELATIONS:
+                nested = cls._nested_fields(field)
+                if nested is False:
+                    return None
+                relations[name] = nested
+                renderers.append((name, cls._relation_renderer(name)))
+                continue
+            renderer = _field_renderer(model, name, field, flat_fields)
+            if renderer is None:
+                return None
+            field_columns, render = renderer
+            columns.extend(column for column in field_columns if column not in columns)
+            renderers.append((name, render))
+        return cls(model, columns, renderers, relations)
+
+    @staticmethod
+    def _nested_fields(field):
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            if all(isinstance(nested, PLAIN_FIELDS) for nested in child.fields.values()):
+                return tuple(nested.source for nested in child.fields.values())
+            return False
+        if isinstance(field, (serializers.ManyRelatedField, serializers.ListField)):
+            return None
+        return False
+
+    @staticmethod
+    def _relation_renderer(name):
+        return lambda row, related, request: related[name].get(row['id'], [])
+
+    def fetch_related(self, rows):
+        """``{relation: {recipe id: [rendered items]}}`` with one query per relation
+
+        The query has the same shape as the prefetch it replaces, so the
+        related items come back in the same order. The relation queries do
+        not depend on each other and run concurrently when
+        ``DB_CONCURRENT_QUERY_WORKERS`` is set.
+        """
+        ids = [row['id'] for row in rows]
+        if not ids:
+            return {name: {} for name in self.relations}
+        names = list(self.relations)
+        results = run_queries([partial(self._fetch_relation, name, ids) for name in names])
+        return dict(zip(names, results))
+
+    def _fetch_relation(self, name, ids):
+        nested = self.relations[name]
+        model = Recipe._meta.get_field(name).related_model
+        by_recipe = {}
+        if nested is None:
+            for recipe_id, pk in model.objects.filter(recipe__in=ids).values_list('recipe', 'id'):
+                by_recipe.setdefault(recipe_id, []).append(pk)
+        else:
+            for values in model.objects.filter(recipe__in=ids).values_list('recipe', *nested):
+                by_recipe.setdefault(values[0], []).append(dict(zip(nested, values[1:])))
+        return by_recipe
+
+    def render(self, rows, request=None):
+        rows = list(rows)
+        related = self.fetch_related(rows) if self.relations else {}
+        renderers = self.renderers
+        return [{name: render(row, related, request) for name, render in renderers} for row in rows]
+
+
+def compile_plan(serializer):
+    """``FlatPlan.compile`` cached by serializer class and rendered fields"""
+    child = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    key = (type(child), tuple(
+        (name, type(field), type(getattr(field, 'child', None))) for name, field in child.fields.items()
+    ))
+    plan = _plans.get(key)
+    if plan is None:
+        plan = FlatPlan.compile(child) or False
+        _plans.set(key, plan)
+    return plan or None
+
+
+class FlatSerializer:
+    """Stands in for the DRF serializer when rendering ``values()`` rows"""
+
+    def __init__(self, plan, instance, many=False, request=None):
+        self.plan = plan
+        self.instance = instance
+        self.many = many
+        self.request = request
+
+    @property
+    def data(self):
+        if self.many:
+            return self.plan.render(self.instance, self.request)
+        return self.plan.render([self.instance], self.request)[0]
+
+
+class FlatReadMixin:
+    """Serve JSON reads from ``values()`` rows through a compiled ``FlatPlan``
+
+    ``get_queryset`` passes its final queryset through ``flat_queryset``,
+    which swaps it for a ``values()`` queryset when the serializer for the
+    request compiles. Everything else (browsable API, writes, serializers
+    with fields the plan does not know) keeps using DRF serializers.
+    """
+    flat_actions = ('list', 'retrieve')
+    flat_plan = None
+
+    def use_flat_serializers(self):
+        return (
+            self.action in self.flat_actions
+            and getattr(settings, 'RECIPE_FLAT_SERIALIZERS', True)
+            and getattr(self.request, 'accepted_renderer', None) is not None
+            and self.request.accepted_renderer.format == 'json'
+        )
+
+    def flat_queryset(self, queryset, serializer=None):
+        if not self.use_flat_serializers():
+            return queryset
+        plan = compile_plan(serializer or self.get_serializer())
+        if plan is None:
+            return queryset
+        self.flat_plan = plan
+        extra = [
+            field.lstrip('-') for field in self.paginator.get_ordering(self.request, self)
+        ] if self.paginator is not None else []
+        columns = plan.columns + [name for name in extra if name not in plan.columns]
+        return queryset.values(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.flat_plan is not None and args:
+            return FlatSerializer(self.flat_plan, args[0], many=kwargs.get('many', False), request=self.request)
+        return super().get_serializer(*args, **kwargs)
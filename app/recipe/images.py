@@ -0,0 +1,163 @@
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.events import recipes_changed
+from core.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+# field name -> (bounding box, Pillow format, file extension)
+RENDITIONS = {
+    'image_thumbnail': ((150, 150), 'JPEG', 'jpg'),
+    'image_medium': ((800, 800), 'JPEG', 'jpg'),
+    'image_webp': ((800, 800), 'WEBP', 'webp'),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'RECIPE_IMAGE_WORKERS', 2),
+                thread_name_prefix='recipe-image',
+            )
+    return _executor
+
+
+def rendition_urls(recipe, request=None):
+    urls = {}
+    for field_name in RENDITIONS:
+        field = getattr(recipe, field_name)
+        url = field.url if field else None
+        if url and request is not None:
+            url = request.build_absolute_uri(url)
+        urls[field_name[len('image_'):]] = url
+    return urls
+
+
+def rendition_urls_from_row(row, request=None):
+    """``rendition_urls`` for a ``values()`` row holding the stored file names"""
+    urls = {}
+    for field_name in RENDITIONS:
+        name = row[field_name]
+        url = Recipe._meta.get_field(field_name).storage.url(name) if name else None
+        if url and request is not None:
+            url = request.build_absolute_uri(url)
+        urls[field_name[len('image_'):]] = url
+    return urls
+
+
+def delete_image_files(recipe):
+    """Remove the stored original and every rendition of ``recipe``"""
+    for field_name in ('image',) + tuple(RENDITIONS):
+        field = getattr(recipe, field_name)
+        if field:
+            field.delete(save=False)
+
+
+def reset_image(recipe):
+    """Drop the current files of ``recipe`` ahead of storing a new upload"""
+    delete_image_files(recipe)
+    recipe.image_status = Recipe.IMAGE_PENDING
+    for field_name in RENDITIONS:
+        setattr(recipe, field_name, None)
+
+
+def schedule_processing(recipe):
+    """Queue ``recipe.image`` for processing once the upload is committed
+
+    The job carries the image name so a job for an image that has since been
+    replaced does nothing. ``RECIPE_IMAGE_PROCESS_INLINE`` runs the job
+    synchronously instead, which is what the tests use. Queued jobs only
+    live in this process, the ``process_pending_images`` command picks up
+    the ones a restart lost.
+    """
+    args = (recipe.pk, recipe.image.name)
+    if getattr(settings, 'RECIPE_IMAGE_PROCESS_INLINE', False):
+        process_image(*args)
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_job, *args))
+
+
+def _run_job(recipe_id, image_name):
+    try:
+        process_image(recipe_id, image_name)
+    except Exception:
+        logger.exception('Processing image %s of recipe %s failed', image_name, recipe_id)
+    finally:
+        connection.close()
+
+
+def _encode(img, fmt):
+    if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, quality=85)
+    return buffer.getvalue()
+
+
+def _set_image_fields(recipe_id, image_name, **fields):
+    """Update the recipe only if it still holds ``image_name``"""
+    updated = Recipe.objects.filter(pk=recipe_id, image=image_name).update(updated_at=timezone.now(), **fields)
+    if updated:
+        user_id = Recipe.objects.filter(pk=recipe_id).values_list('user_id', flat=True).get()
+        recipes_changed.send(sender=Recipe, user_id=user_id, recipe_ids=[recipe_id], fields=tuple(fields))
+    return updated
+
+
+def process_image(recipe_id, image_name):
+    """Validate the original, strip its metadata and write the renditions"""
+    updated = _set_image_fields(recipe_id, image_name, image_status=Recipe.IMAGE_PROCESSING)
+    if not updated:
+        return
+    recipe = Recipe.objects.get(pk=recipe_id)
+
+    try:
+        with recipe.image.open('rb') as image_file:
+            Image.open(image_file).verify()
+        with recipe.image.open('rb') as image_file:
+            img = Image.open(image_file)
+            img.load()
+        fmt = img.format
+        img = ImageOps.exif_transpose(img)
+
+        # Re-encoding without passing ``exif`` drops EXIF and other metadata.
+        original = _encode(img, fmt)
+        renditions = {}
+        for field_name, (size, rendition_format, extension) in RENDITIONS.items():
+            rendition = img.copy()
+            rendition.thumbnail(size, Image.LANCZOS)
+            renditions[field_name] = (_encode(rendition, rendition_format), extension)
+    except (OSError, SyntaxError, ValueError, KeyError, Image.DecompressionBombError):
+        _set_image_fields(recipe_id, image_name, image_status=Recipe.IMAGE_FAILED)
+        return
+
+    storage = recipe.image.storage
+    storage.delete(image_name)
+    # Storages may pick another name than the one asked for.
+    names = {'image': storage.save(image_name, ContentFile(original))}
+
+    for field_name, (content, extension) in renditions.items():
+        field = getattr(recipe, field_name)
+        field.save(f'{field_name}.{extension}', ContentFile(content), save=False)
+        names[field_name] = field.name
+
+    updated = _set_image_fields(recipe_id, image_name, image_status=Recipe.IMAGE_READY, **names)
+    if not updated:
+        # The image was replaced while this job ran, its renditions are stale.
+        for name in names.values():
+            storage.delete(name)
@@ -0,0 +1,87 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Ingredient, Recipe, Tag
+
+from recipe.flat import FlatPlan
+from recipe.serializers import RecipeDetailSerializer, RecipeSerializer, related_prefetch_fields
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF and flat read serializers on throwaway recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--relations', type=int, default=5, help='Tags and ingredients per recipe')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(email='benchmark@serializers.local', password=None)
+        count = options['relations']
+        tags = Tag.objects.upsert_names(user, [f'Tag {i}' for i in range(count)])
+        ingredients = Ingredient.objects.upsert_names(user, [f'Ingredient {i}' for i in range(count)])
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f'Recipe {i}', time_minutes=i % 90, price=f'{i % 1000}.50')
+            for i in range(options['recipes'])
+        )
+        recipe_ids = list(Recipe.objects.filter(user=user).values_list('id', flat=True))
+        for relation, objs in (('tags', tags), ('ingredients', ingredients)):
+            through = getattr(Recipe, relation).through
+            through.objects.bulk_create(
+                through(**{'recipe_id': recipe_id, f'{relation[:-1]}_id': obj.id})
+                for recipe_id in recipe_ids for obj in objs
+            )
+        self.stdout.write(f'{len(recipes)} recipes with {count} tags and {count} ingredients each')
+
+        queryset = Recipe.objects.filter(user=user).order_by('-id')
+        for serializer_class in (RecipeSerializer, RecipeDetailSerializer):
+            self.compare(serializer_class, queryset, options['repeat'])
+
+    def compare(self, serializer_class, queryset, repeat):
+        renderer = JSONRenderer()
+
+        def drf():
+            objs = queryset.with_relations(related_prefetch_fields(serializer_class))
+            return renderer.render(serializer_class(objs, many=True).data)
+
+        plan = FlatPlan.compile(serializer_class())
+
+        def flat():
+            return renderer.render(plan.render(queryset.values(*plan.columns)))
+
+        drf_time, drf_body = self.best_of(drf, repeat)
+        flat_time, flat_body = self.best_of(flat, repeat)
+        if drf_body != flat_body:
+            self.stderr.write(self.style.ERROR(f'{serializer_class.__name__}: outputs differ'))
+            return
+        self.stdout.write(
+            f'{serializer_class.__name__}: drf {drf_time * 1000:.1f}ms, '
+            f'flat {flat_time * 1000:.1f}ms, {drf_time / flat_time:.1f}x faster'
+        )
+
+    @staticmethod
+    def best_of(func, repeat):
+        best, body = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
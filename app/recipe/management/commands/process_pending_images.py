@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Recipe
+
+from recipe.images import process_image
+
+
+class Command(BaseCommand):
+    help = 'Process recipe images whose queued job was lost, e.g. by a worker restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=600,
+            help='Seconds a pending or processing image must have been untouched for',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        stuck = list(
+            Recipe.objects
+            .filter(image_status__in=(Recipe.IMAGE_PENDING, Recipe.IMAGE_PROCESSING), updated_at__lt=cutoff)
+            .exclude(image='')
+            .exclude(image=None)
+            .values_list('id', 'image')
+        )
+        for recipe_id, image_name in stuck:
+            process_image(recipe_id, image_name)
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(stuck)} images'))
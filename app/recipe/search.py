@@ -0,0 +1,119 @@
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import BooleanField, Exists, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe, RecipeSearchTerm
+
+
+TERM_RE = re.compile(r'\w+')
+TITLE_WEIGHT = 4
+NAME_WEIGHT = 1
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    return [term[:MAX_TERM_LENGTH] for term in TERM_RE.findall(text.lower())]
+
+
+def _related_names(relation, recipe_ids):
+    """``{recipe id: [names]}`` of one relation with a single query"""
+    field = Recipe._meta.get_field(relation)
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(recipe_id__in=recipe_ids)
+    names = {}
+    for recipe_id, name in links.values_list('recipe_id', f'{target}__name'):
+        names.setdefault(recipe_id, []).append(name)
+    return names
+
+
+class InvertedIndexBackend:
+    """Search through ``RecipeSearchTerm`` rows, for any database
+
+    Every query word has to occur in the title, a tag or an ingredient, and
+    the rank adds up the weights of the matched words.
+    """
+
+    def index(self, recipe_ids):
+        """Rebuild the terms of ``recipe_ids`` with a fixed number of queries"""
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        recipes = Recipe.objects.filter(pk__in=recipe_ids).values_list('id', 'user_id', 'title')
+        names = [_related_names(relation, recipe_ids) for relation in ('tags', 'ingredients')]
+
+        rows = []
+        for recipe_id, user_id, title in recipes:
+            weights = Counter()
+            for term in tokenize(title):
+                weights[term] += TITLE_WEIGHT
+            for related in names:
+                for name in related.get(recipe_id, ()):
+                    for term in tokenize(name):
+                        weights[term] += NAME_WEIGHT
+            rows.extend(
+                RecipeSearchTerm(recipe_id=recipe_id, user_id=user_id, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+
+        RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSearchTerm.objects.bulk_create(rows)
+
+    def search(self, queryset, text):
+        terms = sorted(set(tokenize(text)))
+        if not terms:
+            return queryset.annotate(search_rank=Value(0, output_field=IntegerField())).none()
+        matches = RecipeSearchTerm.objects.filter(recipe=OuterRef('pk'), user=OuterRef('user'))
+        for term in terms:
+            queryset = queryset.filter(Exists(matches.filter(term=term)))
+        rank = matches.filter(term__in=terms).values('recipe').annotate(total=Sum('weight')).values('total')
+        return queryset.annotate(search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), 0))
+
+
+class PostgresBackend:
+    """Search the ``search_vector`` column through its GIN index
+
+    The column is added by a migration that only runs on PostgreSQL and
+    holds the title with weight A and the tag and ingredient names with
+    weight B.
+    """
+    config = 'english'
+    update_sql = '''
+        UPDATE core_recipe SET search_vector =
+            setweight(to_tsvector(%(config)s, core_recipe.title), 'A') ||
+            setweight(to_tsvector(%(config)s, concat_ws(' ',
+                (SELECT string_agg(t.name, ' ') FROM core_tag t
+                 JOIN core_recipe_tags rt ON rt.tag_id = t.id WHERE rt.recipe_id = core_recipe.id),
+                (SELECT string_agg(i.name, ' ') FROM core_ingredient i
+                 JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id WHERE ri.recipe_id = core_recipe.id)
+            )), 'B')
+        WHERE core_recipe.id = ANY(%(ids)s)
+    '''
+
+    def index(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(self.update_sql, {'config': self.config, 'ids': recipe_ids})
+
+    def search(self, queryset, text):
+        if not tokenize(text):
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+        query = f"plainto_tsquery('{self.config}', %s)"
+        return queryset.annotate(
+            search_match=RawSQL(f'core_recipe.search_vector @@ {query}', (text,), output_field=BooleanField()),
+            # double precision so the rank survives a round trip through the cursor exactly
+            search_rank=RawSQL(
+                f'ts_rank(core_recipe.search_vector, {query})::double precision', (text,), output_field=FloatField(),
+            ),
+        ).filter(search_match=True)
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresBackend()
+    return InvertedIndexBackend()
@@ -1,7 +1,157 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
 from rest_framework import serializers
+from rest_framework.utils import html
 
 from core.models import Tag, Ingredient, Recipe
 
+from recipe.images import RENDITIONS, rendition_urls, rendition_urls_from_row
+
+
+RECIPE_RELATIONS = ('ingredients', 'tags')
+
+
+def _fields_of(serializer):
+    """``(declared fields, rendered field names)`` of a serializer class or instance"""
+    if isinstance(serializer, type):
+        return serializer._declared_fields, serializer.Meta.fields
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    return serializer.fields, tuple(serializer.fields)
+
+
+def related_prefetch_fields(serializer):
+    """Return the fields each recipe relation needs for ``serializer``
+
+    Primary key fields only need ``id``, nested serializers need the fields
+    of their child serializer and relations that are not rendered at all
+    are left out so they are never prefetched. ``serializer`` may be a
+    class or an instance whose fields were narrowed by the request.
+    """
+    declared, field_names = _fields_of(serializer)
+    relations = {}
+    for name in RECIPE_RELATIONS:
+        field = declared.get(name)
+        if name not in field_names or field is None:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            relations[name] = field.child.Meta.fields
+        elif isinstance(field, (serializers.ManyRelatedField, InlineRelatedField)):
+            relations[name] = ('id',)
+    return relations
+
+
+def recipe_columns(serializer):
+    """The ``Recipe`` columns the rendered fields of ``serializer`` read
+
+    Returns ``None`` when a field cannot be traced back to its columns, in
+    which case the whole row has to be loaded.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    field_columns = getattr(serializer, 'field_columns', {})
+    columns = {'id'}
+    for name, field in serializer.fields.items():
+        if name in RECIPE_RELATIONS:
+            continue
+        if name in field_columns:
+            columns.update(field_columns[name])
+            continue
+        try:
+            model_field = Recipe._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        columns.add(model_field.name)
+    return sorted(columns)
+
+
+class SparseFieldsMixin:
+    """Render only ``fields`` and nest the relations named in ``expand``
+
+    Both come from the ``?fields=`` and ``?expand=`` query parameters.
+    Unknown names are rejected rather than silently ignored.
+    """
+    expandable = {}
+    field_columns = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        unknown = sorted(set(expand) - set(self.expandable))
+        if unknown:
+            raise serializers.ValidationError({'expand': _('Unknown relation(s): %(names)s') % {
+                'names': ', '.join(unknown)}})
+        for name in expand:
+            self.fields[name] = self.expandable[name](many=True, read_only=True)
+
+        if fields is not None:
+            unknown = sorted(set(fields) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError({'fields': _('Unknown field(s): %(names)s') % {
+                    'names': ', '.join(unknown)}})
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RelatedRefField(serializers.Field):
+    """One related object given by id, by name, or as ``{"id": ...}`` / ``{"name": ...}``
+
+    Validates to ``('id', pk)`` or ``('name', name)``. A bare string of
+    digits is an id, as that is how HTML forms send ids.
+    """
+    default_error_messages = {
+        'invalid': _('Expected an id, a name or an object with either.'),
+        'max_length': _('Ensure this field has no more than {max_length} characters.'),
+    }
+    max_length = 255
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            if 'id' in data:
+                data = data['id']
+                if isinstance(data, str) and not data.strip().isdigit():
+                    self.fail('invalid')
+            elif isinstance(data.get('name'), str):
+                return self._name(data['name'])
+            else:
+                self.fail('invalid')
+
+        if isinstance(data, int) and not isinstance(data, bool):
+            return ('id', data)
+        if isinstance(data, str):
+            if data.strip().isdigit():
+                return ('id', int(data))
+            return self._name(data)
+        self.fail('invalid')
+
+    def _name(self, name):
+        name = name.strip()
+        if not name:
+            self.fail('invalid')
+        if len(name) > self.max_length:
+            self.fail('max_length', max_length=self.max_length)
+        return ('name', name)
+
+    def to_representation(self, obj):
+        return obj.pk
+
+
+class InlineRelatedField(serializers.ListField):
+    """A recipe relation written as a list of ``RelatedRefField`` items and read as ids"""
+    child = RelatedRefField()
+
+    def get_value(self, dictionary):
+        # Like ``ManyRelatedField``, a form without the field means no objects.
+        if html.is_html_input(dictionary) and self.field_name not in dictionary \
+                and not getattr(self.root, 'partial', False):
+            return []
+        return super().get_value(dictionary)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance).all()
+
 
 class TagSerializer(serializers.ModelSerializer):
 
@@ -19,30 +169,130 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    ingredients = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Ingredient.objects.all()
-    )
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all()
-    )
+class TagCountSerializer(TagSerializer):
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('recipe_count',)
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ('recipe_count',)
+
+
+class NameBatchSerializer(serializers.Serializer):
+    names = serializers.ListField(child=serializers.CharField(max_length=255), allow_empty=False)
+
+    def validate_names(self, names):
+        max_items = getattr(settings, 'RECIPE_BULK_MAX_ITEMS', 2000)
+        if len(names) > max_items:
+            raise serializers.ValidationError(_('At most %(max)d names are allowed per request.') % {'max': max_items})
+        return names
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Recipes with their tags and ingredients given by id or inline by name
+
+    Ids are checked with one query per relation while validating. On save
+    the names are resolved, and the missing ones created, with one upsert
+    per model and the links are written with one insert per through table.
+    """
+    ingredients = InlineRelatedField()
+    tags = InlineRelatedField()
+    expandable = {'ingredients': IngredientSerializer, 'tags': TagSerializer}
 
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes', 'price',)
         read_only_fields = ('id',)
 
+    def validate(self, attrs):
+        user = self.context['request'].user
+        for name in RECIPE_RELATIONS:
+            ids = {value for kind, value in attrs.get(name, ()) if kind == 'id'}
+            if not ids:
+                continue
+            model = Recipe._meta.get_field(name).related_model
+            missing = ids - set(model.objects.filter(user=user, id__in=ids).values_list('id', flat=True))
+            if missing:
+                raise serializers.ValidationError({name: [
+                    _('Invalid pk "%(pk)s" - object does not exist.') % {'pk': pk} for pk in sorted(missing)
+                ]})
+        return attrs
+
+    def _resolve(self, user, relations):
+        resolved = {}
+        for name, refs in relations.items():
+            names = [value for kind, value in refs if kind == 'name']
+            model = Recipe._meta.get_field(name).related_model
+            created = iter(model.objects.upsert_names(user, names) if names else ())
+            resolved[name] = [value if kind == 'id' else next(created).pk for kind, value in refs]
+        return resolved
+
+    def _split_relations(self, validated_data):
+        return {name: validated_data.pop(name) for name in RECIPE_RELATIONS if name in validated_data}
+
+    def create(self, validated_data):
+        relations = self._split_relations(validated_data)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            if any(relations.values()):
+                Recipe.objects.bulk_set_relations([(recipe, self._resolve(recipe.user, relations))], replace=False)
+        return recipe
+
+    def update(self, instance, validated_data):
+        relations = self._split_relations(validated_data)
+        with transaction.atomic():
+            for name, value in validated_data.items():
+                setattr(instance, name, value)
+            instance.save()
+            if relations:
+                Recipe.objects.bulk_set_relations([(instance, self._resolve(instance.user, relations))])
+        return instance
+
+
+class RecipeBulkSerializer(serializers.ModelSerializer):
+    """Validate one item of a bulk request without touching the database
+
+    Related ids are checked for the whole batch at once by ``recipe.bulk``.
+    """
+    id = serializers.IntegerField(required=False)
+    ingredients = serializers.ListField(child=serializers.IntegerField(), required=False)
+    tags = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Recipe
+        fields = RecipeSerializer.Meta.fields
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = IngredientSerializer(many=True, read_only=True)
+    renditions = serializers.SerializerMethodField()
+    field_columns = {'renditions': tuple(RENDITIONS)}
+    flat_fields = {'renditions': (tuple(RENDITIONS), rendition_urls_from_row)}
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image', 'image_status', 'renditions')
+        read_only_fields = ('id', 'image', 'image_status')
+
+    def get_renditions(self, recipe):
+        return rendition_urls(recipe, self.context.get('request'))
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
+    # A plain file field: decoding and verifying the image happens in the
+    # background worker, not on the request thread.
+    image = serializers.FileField()
+    renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image',)
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status', 'renditions')
+        read_only_fields = ('id', 'image_status')
+
+    def get_renditions(self, recipe):
+        return rendition_urls(recipe, self.context.get('request'))
@@ -0,0 +1,92 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.events import recipes_changed
+from core.models import Ingredient, Recipe, Tag
+
+from recipe.cache import get_response_cache
+from recipe.search import get_search_backend
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    get_response_cache().invalidate(instance.user_id, [instance.pk])
+
+
+@receiver(recipes_changed)
+def invalidate_changed_recipes(sender, user_id, recipe_ids, **kwargs):
+    get_response_cache().invalidate(user_id, recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            get_response_cache().invalidate(instance.user_id, [instance.pk])
+    elif action == 'pre_clear':
+        # The recipes are only known before the links are gone.
+        get_response_cache().invalidate(instance.user_id, instance.recipe_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        get_response_cache().invalidate(instance.user_id, pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def invalidate_attr_recipes(sender, instance, created, **kwargs):
+    """Recipe details embed names, list pages only the ids"""
+    if not created:
+        get_response_cache().invalidate(instance.user_id, instance.recipe_set.values_list('id', flat=True), lists=False)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def invalidate_deleted_attr_recipes(sender, instance, **kwargs):
+    # Cascading deletes of the links send no m2m_changed.
+    get_response_cache().invalidate(instance.user_id, instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields, **kwargs):
+    if update_fields is None or 'title' in update_fields:
+        get_search_backend().index([instance.pk])
+
+
+@receiver(recipes_changed)
+def index_changed_recipes(sender, recipe_ids, fields=None, **kwargs):
+    if fields is None or 'title' in fields:
+        get_search_backend().index(recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_recipe_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            get_search_backend().index([instance.pk])
+    elif action == 'pre_clear':
+        instance._search_recipe_ids = list(instance.recipe_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        get_search_backend().index(instance._search_recipe_ids)
+    elif action in ('post_add', 'post_remove'):
+        get_search_backend().index(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_attr_recipes(sender, instance, created, **kwargs):
+    if not created:
+        get_search_backend().index(instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_deleted_attr_recipes(sender, instance, **kwargs):
+    instance._search_recipe_ids = list(instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_deleted_attr_recipes(sender, instance, **kwargs):
+    get_search_backend().index(getattr(instance, '_search_recipe_ids', ()))
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.autocomplete import PrefixIndex, reset_prefix_indexes
+
+
+TAG_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
+INGREDIENT_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class PrefixIndexTests(TestCase):
+
+    def test_complete_prefix_by_usage(self):
+        index = PrefixIndex([(1, 'Potato', 1), (2, 'Paneer', 3), (3, 'Pepper', 3), (4, 'Onion', 9)])
+
+        self.assertEqual([match['name'] for match in index.complete('p', 10)], ['Paneer', 'Pepper', 'Potato'])
+        self.assertEqual([match['name'] for match in index.complete('PO', 10)], ['Potato'])
+        self.assertEqual([match['name'] for match in index.complete('', 2)], ['Onion', 'Paneer'])
+        self.assertEqual(index.complete('x', 10), [])
+
+
+class AutocompleteApiTests(TestCase):
+
+    def setUp(self):
+        reset_prefix_indexes()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        reset_prefix_indexes()
+
+    def test_login_required(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 's'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_ingredients_ordered_by_usage(self):
+        potato = Ingredient.objects.create(user=self.user, name='Potato')
+        paneer = Ingredient.objects.create(user=self.user, name='Paneer')
+        Ingredient.objects.create(user=self.user, name='Pepper')
+        Ingredient.objects.create(user=self.user, name='Onion')
+        for i in range(2):
+            sample_recipe(self.user, title=f'Recipe {i}').ingredients.add(paneer)
+        sample_recipe(self.user).ingredients.add(potato)
+
+        res = self.client.get(INGREDIENT_AUTOCOMPLETE_URL, {'q': 'p', 'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': paneer.id, 'name': 'Paneer', 'recipe_count': 2},
+            {'id': potato.id, 'name': 'Potato', 'recipe_count': 1},
+        ])
+
+    def test_limited_to_user(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        Tag.objects.create(user=user2, name='Spicy')
+        tag = Tag.objects.create(user=self.user, name='Sweet')
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 's'})
+
+        self.assertEqual([match['id'] for match in res.data], [tag.id])
+
+    def test_warm_index_needs_only_version_query(self):
+        Tag.objects.create(user=self.user, name='Spicy')
+        self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 's'})
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'sp'})
+
+        self.assertEqual(res.data[0]['name'], 'Spicy')
+
+    def test_index_follows_changes(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 's'})
+
+        Tag.objects.create(user=self.user, name='Sweet')
+        sample_recipe(self.user).tags.add(tag)
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 's'})
+
+        self.assertEqual(
+            [(match['name'], match['recipe_count']) for match in res.data],
+            [('Spicy', 1), ('Sweet', 0)],
+        )
+
+    def test_invalid_limit(self):
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 's', 'limit': 'ten'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
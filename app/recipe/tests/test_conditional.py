@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user)
+
+    def assertNotModified(self, url, params=None, **headers):
+        res = self.client.get(url, params, **headers)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        return res
+
+    def assertModified(self, url, params=None, **headers):
+        res = self.client.get(url, params, **headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_validators_returned(self):
+        res = self.client.get(RECIPE_URL)
+
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertIn('Authorization', res['Vary'])
+
+    def test_matching_etag_answered_with_single_query(self):
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.assertNotModified(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res['ETag'], etag)
+
+    def test_if_modified_since(self):
+        Tag.objects.create(user=self.user, name='Spicy')
+        last_modified = self.client.get(TAG_URL)['Last-Modified']
+
+        self.assertNotModified(TAG_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_etag_changes_when_recipe_created(self):
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        sample_recipe(self.user, title='Vada Pav')
+
+        self.assertModified(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+    def test_etag_changes_when_recipe_tags_change(self):
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Spicy'))
+
+        self.assertModified(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+    def test_etag_changes_when_tag_renamed(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.recipe.tags.add(tag)
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        tag.name = 'Hot'
+        tag.save()
+
+        self.assertModified(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+    def test_etag_changes_when_existing_tag_linked(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        for params in ({'assigned_only': 1}, {'with_counts': 1}):
+            etag = self.client.get(TAG_URL, params)['ETag']
+
+            self.recipe.tags.add(tag)
+
+            res = self.assertModified(TAG_URL, params, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(len(res.data['results']), 1)
+            self.recipe.tags.remove(tag)
+
+    def test_etag_changes_after_bulk_create(self):
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.post(BULK_URL, [{'title': 'Misal', 'time_minutes': 5, 'price': '5.00'}], format='json')
+
+        self.assertModified(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.assertModified(RECIPE_URL, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+
+    def test_etag_depends_on_object(self):
+        other = sample_recipe(self.user, title='Vada Pav')
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        self.assertModified(detail_url(other.id), HTTP_IF_NONE_MATCH=etag)
+
+    def test_other_users_changes_ignored(self):
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        sample_recipe(user2)
+
+        self.assertNotModified(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
@@ -0,0 +1,147 @@
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from core.db import concurrent
+from core.db.concurrent import reset_query_executor
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.cache import reset_response_cache
+from recipe.flat import FlatPlan
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(RECIPE_IMAGE_PROCESS_INLINE=True)
+class FlatSerializerTests(TestCase):
+    """The flat read path must answer byte for byte what the DRF one does"""
+
+    def setUp(self):
+        reset_response_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        tags = [Tag.objects.create(user=self.user, name=name) for name in ('Spicy', 'Street Food', 'Sweet')]
+        ingredients = [Ingredient.objects.create(user=self.user, name=name) for name in ('Potato', 'Onion')]
+        self.recipes = []
+        for i, price in enumerate(('5.00', '110', '0.5', '999.99')):
+            recipe = Recipe.objects.create(user=self.user, title=f'Recipe {i}', time_minutes=i, price=price)
+            recipe.tags.add(*tags[:i])
+            recipe.ingredients.add(*ingredients[:i])
+            self.recipes.append(recipe)
+        self.upload_image(self.recipes[0])
+
+    def tearDown(self):
+        reset_response_cache()
+
+    def upload_image(self, recipe):
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (20, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(url, {'image': ntf}, format='multipart')
+
+    def assertSameResponse(self, url, params=None):
+        with override_settings(RECIPE_FLAT_SERIALIZERS=False):
+            reset_response_cache()
+            expected = self.client.get(url, params)
+        reset_response_cache()
+        with patch.object(FlatPlan, 'render', autospec=True, side_effect=FlatPlan.render) as render:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res.content, expected.content)
+        self.assertTrue(render.called)
+
+    def test_recipe_list(self):
+        self.assertSameResponse(RECIPES_URL)
+
+    def test_recipe_list_sparse(self):
+        self.assertSameResponse(RECIPES_URL, {'fields': 'id,price,tags', 'expand': 'tags'})
+
+    def test_recipe_list_paginated(self):
+        first = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertSameResponse(first.data['next'])
+
+    def test_recipe_search(self):
+        self.assertSameResponse(RECIPES_URL, {'search': 'recipe', 'page_size': 2})
+
+    def test_recipe_detail(self):
+        for recipe in self.recipes:
+            self.assertSameResponse(detail_url(recipe.id))
+
+    def test_tag_lists(self):
+        self.assertSameResponse(TAGS_URL)
+        self.assertSameResponse(TAGS_URL, {'with_counts': 1})
+        self.assertSameResponse(INGREDIENTS_URL, {'assigned_only': 1, 'with_counts': 1})
+
+    def test_browsable_api_uses_drf_serializers(self):
+        with patch.object(FlatPlan, 'render') as render:
+            res = self.client.get(RECIPES_URL, HTTP_ACCEPT='text/html')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(render.called)
+
+
+class BenchmarkSerializersCommandTests(TestCase):
+
+    def test_benchmark_rolls_back(self):
+        out, err = StringIO(), StringIO()
+
+        call_command('benchmark_serializers', recipes=3, relations=2, repeat=1, stdout=out, stderr=err)
+
+        self.assertIn('RecipeSerializer:', out.getvalue())
+        self.assertIn('RecipeDetailSerializer:', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class ConcurrentRelationsTests(TransactionTestCase):
+    """Relation queries run on their own connections, so the rows must be committed"""
+
+    def setUp(self):
+        reset_response_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        ingredient = Ingredient.objects.create(user=self.user, name='Potato')
+        self.recipe = Recipe.objects.create(user=self.user, title='Aloo', time_minutes=5, price='5.00')
+        self.recipe.tags.add(tag)
+        self.recipe.ingredients.add(ingredient)
+
+    def tearDown(self):
+        reset_query_executor()
+        reset_response_cache()
+
+    def test_detail_matches_sequential(self):
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        expected = self.client.get(url).content
+
+        with override_settings(DB_CONCURRENT_QUERY_WORKERS=2):
+            reset_query_executor()
+            reset_response_cache()
+            with patch('core.db.concurrent._call', wraps=concurrent._call) as call:
+                res = self.client.get(url)
+
+        self.assertEqual(call.call_count, 2)
+        self.assertEqual(res.content, expected)
+        self.assertIn(b'Potato', res.content)
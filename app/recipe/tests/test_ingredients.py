@@ -10,6 +10,7 @@ from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 ING_URL = reverse('recipe:ingredient-list')
+UPSERT_URL = reverse('recipe:ingredient-upsert')
 
 
 class PublicIngredientApiTests(TestCase):
@@ -38,7 +39,7 @@ class PrivateIngredientApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         ings = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(ings, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
@@ -48,8 +49,8 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.get(ING_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ing.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ing.name)
 
     def test_create_ingredient_successful(self):
         payload = {'name': 'Potato'}
@@ -58,6 +59,15 @@ class PrivateIngredientApiTests(TestCase):
         exists = Ingredient.objects.filter(user=self.user, name=payload['name']).exists()
         self.assertTrue(exists)
 
+    def test_upsert_ingredients(self):
+        potato = Ingredient.objects.create(user=self.user, name='Potato')
+
+        res = self.client.post(UPSERT_URL, {'names': ['potato', 'Onion']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0], {'id': potato.id, 'name': 'Potato'})
+        self.assertTrue(Ingredient.objects.filter(user=self.user, name='Onion').exists())
+
     def test_create_ingredient_invalid(self):
         payload = {'name': ''}
         res = self.client.post(ING_URL, payload)
@@ -79,8 +89,8 @@ class PrivateIngredientApiTests(TestCase):
 
         serializer1 = IngredientSerializer(ingredient1)
         serializer2 = IngredientSerializer(ingredient2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_ingredients_assigned_unique(self):
         ingredient = Ingredient.objects.create(user=self.user, name='Onion')
@@ -102,4 +112,29 @@ class PrivateIngredientApiTests(TestCase):
 
         res = self.client.get(ING_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_ingredients_with_counts(self):
+        onion = Ingredient.objects.create(user=self.user, name='Onion')
+        potato = Ingredient.objects.create(user=self.user, name='Potato')
+        for title in ('Pav Bhaji', 'Masala Pav'):
+            recipe = Recipe.objects.create(title=title, time_minutes=30, price=110, user=self.user)
+            recipe.ingredients.add(onion)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(ING_URL, {'with_counts': 1})
+
+        self.assertEqual(res.data['results'], [
+            {'id': potato.id, 'name': potato.name, 'recipe_count': 0},
+            {'id': onion.id, 'name': onion.name, 'recipe_count': 2},
+        ])
+
+    def test_retrieve_assigned_ingredients_with_counts(self):
+        onion = Ingredient.objects.create(user=self.user, name='Onion')
+        Ingredient.objects.create(user=self.user, name='Potato')
+        recipe = Recipe.objects.create(title='Pav Bhaji', time_minutes=30, price=110, user=self.user)
+        recipe.ingredients.add(onion)
+
+        res = self.client.get(ING_URL, {'assigned_only': 1, 'with_counts': 1})
+
+        self.assertEqual(res.data['results'], [{'id': onion.id, 'name': onion.name, 'recipe_count': 1}])
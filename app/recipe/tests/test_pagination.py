@@ -0,0 +1,138 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, Tag
+
+from recipe.pagination import RecipeAttrPagination
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def cursor(position):
+    return base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, params):
+        """Follow next links from the first page and collect every result id"""
+        ids = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in res.data['results'])
+            if not res.data['next']:
+                return ids
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_paginated_by_page_size(self):
+        for i in range(5):
+            sample_recipe(self.user, title=f'Recipe {i}')
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_walk_all_recipe_pages(self):
+        recipes = [sample_recipe(self.user, title=f'Recipe {i}') for i in range(7)]
+
+        ids = self.walk(RECIPE_URL, {'page_size': 3})
+
+        self.assertEqual(ids, sorted((recipe.id for recipe in recipes), reverse=True))
+
+    def test_walk_tag_pages(self):
+        names = ['Spicy', 'Sweet', 'Hot', 'Sour', 'Bitter', 'Umami']
+        tags = [Tag.objects.create(user=self.user, name=name) for name in names]
+
+        ids = self.walk(TAG_URL, {'page_size': 2})
+
+        expected = sorted(tags, key=lambda tag: (tag.name, tag.id), reverse=True)
+        self.assertEqual(ids, [tag.id for tag in expected])
+
+    def test_walk_tag_pages_with_duplicate_names(self):
+        """Names are only unique per user, so ties on name are broken by id"""
+        users = [self.user] + [
+            get_user_model().objects.create_user(email=f'user{i}@sahil.com', password='sahil123') for i in range(3)
+        ]
+        tags = [Tag.objects.create(user=user, name='Spicy') for user in users]
+        tags += [Tag.objects.create(user=self.user, name=name) for name in ['Sweet', 'Hot']]
+
+        ids = []
+        url = f'{TAG_URL}?page_size=2'
+        while url:
+            paginator = RecipeAttrPagination()
+            page = paginator.paginate_queryset(Tag.objects.all(), Request(APIRequestFactory().get(url)))
+            ids.extend(tag.id for tag in page)
+            url = paginator.get_next_link()
+
+        expected = sorted(tags, key=lambda tag: (tag.name, tag.id), reverse=True)
+        self.assertEqual(ids, [tag.id for tag in expected])
+
+    def test_previous_link_returns_prior_page(self):
+        for i in range(6):
+            sample_recipe(self.user, title=f'Recipe {i}')
+        first = self.client.get(RECIPE_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        res = self.client.get(second.data['previous'])
+
+        self.assertEqual(res.data['results'], first.data['results'])
+        self.assertIsNone(res.data['previous'])
+        self.assertIsNotNone(res.data['next'])
+
+    def test_deep_page_query_count_is_constant(self):
+        for i in range(30):
+            sample_recipe(self.user, title=f'Recipe {i}')
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        for _ in range(10):
+            res = self.client.get(res.data['next'])
+
+        with self.assertNumQueries(4):
+            self.client.get(res.data['next'])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(RECIPE_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        sample_recipe(self.user)
+
+        for url, params in ((RECIPE_URL, {'cursor': cursor(['a'])}),
+                            (RECIPE_URL, {'cursor': cursor(['a']), 'search': 'pav'}),
+                            (RECIPE_URL, {'cursor': cursor(['a', 1]), 'search': 'pav'}),
+                            (TAG_URL, {'cursor': cursor(['Spicy', 'a'])})):
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND, params)
+
+    @override_settings(RECIPE_PAGE_SIZE=2, RECIPE_MAX_PAGE_SIZE=3)
+    def test_page_size_settings(self):
+        for i in range(5):
+            sample_recipe(self.user, title=f'Recipe {i}')
+
+        default = self.client.get(RECIPE_URL)
+        capped = self.client.get(RECIPE_URL, {'page_size': 100})
+
+        self.assertEqual(len(default.data['results']), 2)
+        self.assertEqual(len(capped.data['results']), 3)
@@ -5,7 +5,9 @@ from PIL import Image
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -71,7 +73,7 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
@@ -83,8 +85,8 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_detail(self):
         recipe = sample_recipe(user=self.user)
@@ -146,6 +148,70 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ing1, ingredients)
         self.assertIn(ing2, ingredients)
 
+    def test_create_recipe_with_inline_names(self):
+        onion = sample_ingredient(user=self.user, name='Onion')
+        payload = {
+            'title': 'Pav Bhaji',
+            'tags': ['Street Food', {'name': 'Spicy'}],
+            'ingredients': [onion.id, 'onion', {'id': onion.id}, {'name': 'Potato'}, 'Butter'],
+            'time_minutes': 30,
+            'price': 110,
+        }
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(sorted(tag.name for tag in recipe.tags.all()), ['Spicy', 'Street Food'])
+        self.assertEqual(sorted(i.name for i in recipe.ingredients.all()), ['Butter', 'Onion', 'Potato'])
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(sorted(res.data['tags']), sorted(tag.id for tag in recipe.tags.all()))
+
+    def test_inline_names_query_count_is_constant(self):
+        def payload(count):
+            return {
+                'title': 'Pav Bhaji',
+                'tags': [f'Tag {count}-{i}' for i in range(count)],
+                'ingredients': [f'Ingredient {count}-{i}' for i in range(count)],
+                'time_minutes': 30,
+                'price': 110,
+            }
+        self.client.post(RECIPE_URL, payload(1), format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(RECIPE_URL, payload(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(RECIPE_URL, payload(10), format='json')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_create_recipe_with_other_users_tag(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        tag = sample_tag(user=user2)
+
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Pav Bhaji', 'tags': [tag.id], 'ingredients': [], 'time_minutes': 30, 'price': 110,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_with_invalid_reference(self):
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Pav Bhaji', 'tags': [{'colour': 'red'}], 'ingredients': [], 'time_minutes': 30, 'price': 110,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_recipe_with_inline_names(self):
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user, name='Old'))
+
+        res = self.client.patch(detail_url(recipe.id), {'tags': ['New']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag.name for tag in recipe.tags.all()], ['New'])
+
     def test_partial_update_recipe(self):
         recipe = sample_recipe(user=self.user)
         url = detail_url(recipe.id)
@@ -197,8 +263,9 @@ class RecipeImageUploadTest(TestCase):
             res = self.client.post(url, {'image': ntf}, format='multipart')
 
         self.recipe.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
     def test_upload_image_bad_request(self):
@@ -224,9 +291,9 @@ class RecipeImageUploadTest(TestCase):
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         recipe1 = sample_recipe(user=self.user, title='Pav Bhaji')
@@ -245,6 +312,6 @@ class RecipeImageUploadTest(TestCase):
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
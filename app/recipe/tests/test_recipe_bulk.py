@@ -0,0 +1,143 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class RecipeBulkApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.ingredient = Ingredient.objects.create(user=self.user, name='Potato')
+
+    def payload(self, count):
+        return [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [self.tag.id],
+                'ingredients': [self.ingredient.id],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        res = self.client.post(BULK_URL, self.payload(3), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        for result in res.data['results']:
+            recipe = Recipe.objects.get(id=result['data']['id'])
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+
+    @skipUnlessDBFeature('can_return_rows_from_bulk_insert')
+    def test_bulk_create_query_count_is_constant(self):
+        self.client.post(BULK_URL, self.payload(1), format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BULK_URL, self.payload(20), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BULK_URL, self.payload(40), format='json')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_bulk_create_links_written_in_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(BULK_URL, self.payload(20), format='json')
+
+        link_inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "core_recipe_tags"')]
+        lookups = [q for q in queries if q['sql'].startswith('SELECT "core_tag"."id" FROM "core_tag"')]
+        self.assertEqual(len(link_inserts), 1)
+        self.assertEqual(len(lookups), 1)
+
+    def test_bulk_create_reports_item_errors(self):
+        other = Tag.objects.create(
+            user=get_user_model().objects.create_user(email='test@test.com', password='test123'),
+            name='Sweet',
+        )
+        payload = self.payload(3)
+        payload[1]['title'] = ''
+        payload[2]['tags'] = [other.id]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [result['status'] for result in res.data['results']]
+        self.assertEqual(statuses, [201, 400, 400])
+        self.assertIn('title', res.data['results'][1]['errors'])
+        self.assertIn('tags', res.data['results'][2]['errors'])
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_bulk_create_all_invalid(self):
+        res = self.client.post(BULK_URL, [{'title': ''}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.count(), 0)
+
+    def test_bulk_create_requires_list(self):
+        res = self.client.post(BULK_URL, {'title': 'Pav Bhaji'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        recipe1 = sample_recipe(self.user, title='Pav Bhaji')
+        recipe2 = sample_recipe(self.user, title='Vada Pav')
+        recipe2.tags.add(self.tag)
+        new_tag = Tag.objects.create(user=self.user, name='Street Food')
+
+        res = self.client.patch(BULK_URL, [
+            {'id': recipe1.id, 'price': '7.50'},
+            {'id': recipe2.id, 'title': 'Misal Pav', 'tags': [new_tag.id]},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.price, Decimal('7.50'))
+        self.assertEqual(recipe1.title, 'Pav Bhaji')
+        self.assertEqual(recipe2.title, 'Misal Pav')
+        self.assertEqual(list(recipe2.tags.all()), [new_tag])
+
+    def test_bulk_update_other_users_recipe(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        recipe = sample_recipe(user2)
+
+        res = self.client.patch(BULK_URL, [{'id': recipe.id, 'title': 'Stolen'}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Pav Bhaji')
+
+    def test_bulk_delete(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        other = sample_recipe(user2)
+
+        res = self.client.delete(BULK_URL, {'ids': [recipe1.id, recipe2.id, other.id]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], [recipe1.id, recipe2.id])
+        self.assertEqual(res.data['not_found'], [other.id])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertTrue(Recipe.objects.filter(id=other.id).exists())
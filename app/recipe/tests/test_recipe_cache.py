@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import CollectionVersion, Recipe, Tag, Ingredient
+
+from recipe.cache import get_response_cache, reset_response_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+STATS_URL = reverse('recipe:recipe-cache-stats')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class RecipeResponseCacheTests(TestCase):
+
+    def setUp(self):
+        reset_response_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.recipe.tags.add(self.tag)
+
+    def tearDown(self):
+        reset_response_cache()
+
+    def test_cached_list_needs_only_version_query(self):
+        self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['tags'], [self.tag.id])
+
+    def test_cached_detail_needs_only_version_query(self):
+        self.client.get(detail_url(self.recipe.id))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['title'], self.recipe.title)
+
+    def test_sparse_detail_not_served_as_full_detail(self):
+        sparse = self.client.get(detail_url(self.recipe.id), {'fields': 'id'})
+        expanded = self.client.get(detail_url(self.recipe.id), {'expand': 'tags'})
+        full = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(sparse.data, {'id': self.recipe.id})
+        self.assertEqual(expanded.data['tags'], [{'id': self.tag.id, 'name': 'Spicy'}])
+        self.assertEqual(full.data['title'], self.recipe.title)
+        self.assertIn('ingredients', full.data)
+
+    @override_settings(ALLOWED_HOSTS=['a.example.com', 'b.example.com'])
+    def test_hosts_cached_separately(self):
+        self.recipe.image = 'uploads/recipe/pav.jpg'
+        self.recipe.save()
+        self.client.get(detail_url(self.recipe.id), HTTP_HOST='a.example.com')
+
+        res = self.client.get(detail_url(self.recipe.id), HTTP_HOST='b.example.com', secure=True)
+
+        self.assertTrue(res.data['image'].startswith('https://b.example.com/'))
+
+    def test_filters_cached_separately(self):
+        sample_recipe(self.user, title='Vada Pav')
+
+        filtered = self.client.get(RECIPES_URL, {'tags': self.tag.id})
+        everything = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(filtered.data['results']), 1)
+        self.assertEqual(len(everything.data['results']), 2)
+
+    def test_users_cached_separately(self):
+        self.client.get(RECIPES_URL)
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        sample_recipe(user2, title='Misal Pav')
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual([recipe['title'] for recipe in res.data['results']], ['Misal Pav'])
+
+    def test_recipe_update_invalidates(self):
+        self.client.get(RECIPES_URL)
+        self.client.get(detail_url(self.recipe.id))
+
+        self.client.patch(detail_url(self.recipe.id), {'title': 'Misal Pav'})
+
+        self.assertEqual(self.client.get(RECIPES_URL).data['results'][0]['title'], 'Misal Pav')
+        self.assertEqual(self.client.get(detail_url(self.recipe.id)).data['title'], 'Misal Pav')
+
+    def test_tag_rename_invalidates_detail(self):
+        self.client.get(detail_url(self.recipe.id))
+
+        self.tag.name = 'Sweet'
+        self.tag.save()
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['tags'][0]['name'], 'Sweet')
+
+    def test_tag_delete_invalidates_list(self):
+        self.client.get(RECIPES_URL)
+
+        self.tag.delete()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+    def test_link_change_invalidates(self):
+        ingredient = Ingredient.objects.create(user=self.user, name='Potato')
+        self.client.get(detail_url(self.recipe.id))
+
+        ingredient.recipe_set.add(self.recipe)
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['ingredients'][0]['name'], 'Potato')
+
+    def test_bulk_update_invalidates(self):
+        self.client.get(RECIPES_URL)
+
+        self.client.patch(BULK_URL, [{'id': self.recipe.id, 'title': 'Misal Pav'}], format='json')
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['title'], 'Misal Pav')
+
+    def test_stale_entry_not_served_without_invalidation(self):
+        """Another process may have missed the signal, the versions still guard it"""
+        self.client.get(RECIPES_URL)
+
+        Recipe.objects.filter(id=self.recipe.id).update(title='Misal Pav')
+        CollectionVersion.objects.bump(self.user.id, CollectionVersion.RECIPES)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['title'], 'Misal Pav')
+        self.assertEqual(get_response_cache().stats()['hits'], 0)
+
+    def test_cache_stats(self):
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['hits'], 1)
+        self.assertEqual(res.data['misses'], 1)
+        self.assertIn('evictions', res.data)
+
+    def test_cache_stats_requires_staff(self):
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,109 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.cache import reset_response_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class RecipeExportTests(TestCase):
+
+    def setUp(self):
+        reset_response_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        reset_response_cache()
+
+    def export(self, **params):
+        res = self.client.get(EXPORT_URL, params)
+        return res, b''.join(res.streaming_content)
+
+    def test_export_ndjson(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        ingredient = Ingredient.objects.create(user=self.user, name='Potato')
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        sample_recipe(self.user, title='Vada Pav')
+
+        res, content = self.export()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+        recipes = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([recipe['title'] for recipe in recipes], ['Vada Pav', 'Pav Bhaji'])
+        self.assertEqual(recipes[1]['tags'], [{'id': tag.id, 'name': 'Spicy'}])
+        self.assertEqual(recipes[1]['ingredients'], [{'id': ingredient.id, 'name': 'Potato'}])
+        self.assertEqual(recipes[1]['price'], '5.00')
+        self.assertIn('renditions', recipes[1])
+
+    def test_export_json_matches_expanded_list(self):
+        for i in range(3):
+            sample_recipe(self.user, title=f'Recipe {i}').tags.add(Tag.objects.create(user=self.user, name=f'Tag {i}'))
+
+        res, content = self.export(**{'as': 'json'})
+        listed = self.client.get(RECIPES_URL, {'expand': 'tags,ingredients'})
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+        exported = json.loads(content)
+        fields = listed.data['results'][0].keys()
+        self.assertEqual([{name: recipe[name] for name in fields} for recipe in exported], listed.json()['results'])
+
+    def test_export_empty(self):
+        self.assertEqual(self.export()[1], b'')
+        self.assertEqual(json.loads(self.export(**{'as': 'json'})[1]), [])
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_queries_per_chunk(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        for i in range(5):
+            sample_recipe(self.user, title=f'Recipe {i}').tags.add(tag)
+
+        with CaptureQueriesContext(connection) as queries:
+            content = self.export()[1]
+
+        self.assertEqual(len(content.splitlines()), 5)
+        # The recipes, then tags and ingredients for each of the three chunks.
+        self.assertEqual(len(queries), 1 + 3 * 2)
+
+    def test_export_applies_filters(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        sample_recipe(self.user).tags.add(tag)
+        sample_recipe(self.user, title='Vada Pav')
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        sample_recipe(user2, title='Misal').tags.add(Tag.objects.create(user=user2, name='Spicy'))
+
+        content = self.export(tags=tag.id)[1]
+
+        self.assertEqual([json.loads(line)['title'] for line in content.splitlines()], ['Pav Bhaji'])
+
+    def test_export_invalid_format(self):
+        res = self.client.get(EXPORT_URL, {'as': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('as', res.data)
+
+    def test_export_requires_auth(self):
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+def ids_param(objs):
+    return ','.join(str(obj.id) for obj in objs)
+
+
+class RecipeFilterTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.spicy = Tag.objects.create(user=self.user, name='Spicy')
+        self.street = Tag.objects.create(user=self.user, name='Street Food')
+        self.veggie = Tag.objects.create(user=self.user, name='Veggie')
+        self.potato = Ingredient.objects.create(user=self.user, name='Potato')
+        self.onion = Ingredient.objects.create(user=self.user, name='Onion')
+
+    def result_ids(self, params):
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data['results']]
+
+    def test_recipe_matching_several_tags_returned_once(self):
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.spicy, self.street, self.veggie)
+
+        ids = self.result_ids({'tags': ids_param([self.spicy, self.street, self.veggie])})
+
+        self.assertEqual(ids, [recipe.id])
+
+    def test_filter_tags_any(self):
+        recipe1 = sample_recipe(self.user, title='Pav Bhaji')
+        recipe2 = sample_recipe(self.user, title='Vada Pav')
+        sample_recipe(self.user, title='Sandwich')
+        recipe1.tags.add(self.spicy)
+        recipe2.tags.add(self.street)
+
+        ids = self.result_ids({'tags': ids_param([self.spicy, self.street]), 'tags_mode': 'any'})
+
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+
+    def test_filter_tags_all(self):
+        recipe1 = sample_recipe(self.user, title='Pav Bhaji')
+        recipe2 = sample_recipe(self.user, title='Vada Pav')
+        recipe1.tags.add(self.spicy, self.street, self.veggie)
+        recipe2.tags.add(self.spicy)
+
+        ids = self.result_ids({'tags': ids_param([self.spicy, self.street]), 'tags_mode': 'all'})
+
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_all_ignores_repeated_ids(self):
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.spicy)
+
+        ids = self.result_ids({'tags': f'{self.spicy.id},{self.spicy.id}', 'tags_mode': 'all'})
+
+        self.assertEqual(ids, [recipe.id])
+
+    def test_filter_tags_and_ingredients_combined(self):
+        recipe1 = sample_recipe(self.user, title='Pav Bhaji')
+        recipe2 = sample_recipe(self.user, title='Vada Pav')
+        recipe1.tags.add(self.spicy)
+        recipe1.ingredients.add(self.potato, self.onion)
+        recipe2.tags.add(self.spicy)
+        recipe2.ingredients.add(self.potato)
+
+        ids = self.result_ids({
+            'tags': ids_param([self.spicy]),
+            'ingredients': ids_param([self.potato, self.onion]),
+            'ingredients_mode': 'all',
+        })
+
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_limited_to_user(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        other = sample_recipe(user2)
+        other.tags.add(self.spicy)
+
+        ids = self.result_ids({'tags': ids_param([self.spicy])})
+
+        self.assertEqual(ids, [])
+
+    def test_invalid_ids_rejected(self):
+        res = self.client.get(RECIPE_URL, {'tags': '1,spicy'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+
+    def test_invalid_mode_rejected(self):
+        res = self.client.get(RECIPE_URL, {'ingredients': '1', 'ingredients_mode': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ingredients_mode', res.data)
@@ -0,0 +1,181 @@
+import io
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.utils import timezone
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe import images
+
+
+def image_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(RECIPE_IMAGE_PROCESS_INLINE=True)
+class RecipeImageProcessingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Pav Bhaji', time_minutes=5, price=5.00)
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        images.delete_image_files(self.recipe)
+
+    def upload(self, img, **save_kwargs):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            img.save(ntf, format='JPEG', **save_kwargs)
+            ntf.seek(0)
+            return self.client.post(image_url(self.recipe.id), {'image': ntf}, format='multipart')
+
+    def test_renditions_generated(self):
+        res = self.upload(Image.new('RGB', (1600, 1200)))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        with Image.open(self.recipe.image_thumbnail.path) as thumbnail:
+            self.assertEqual(max(thumbnail.size), 150)
+        with Image.open(self.recipe.image_medium.path) as medium:
+            self.assertEqual(medium.size, (800, 600))
+        with Image.open(self.recipe.image_webp.path) as webp:
+            self.assertEqual(webp.format, 'WEBP')
+
+    def test_exif_stripped(self):
+        exif = Image.Exif()
+        exif[0x010f] = 'PhoneMaker'
+
+        self.upload(Image.new('RGB', (20, 20)), exif=exif.tobytes())
+
+        self.recipe.refresh_from_db()
+        with Image.open(self.recipe.image.path) as img:
+            self.assertNotIn('exif', img.info)
+
+    def test_invalid_image_marked_failed(self):
+        buffer = io.BytesIO()
+        Image.effect_noise((200, 200), 64).convert('RGB').save(buffer, format='JPEG')
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            # A valid header followed by truncated pixel data.
+            ntf.write(buffer.getvalue()[:len(buffer.getvalue()) // 2])
+            ntf.seek(0)
+            res = self.client.post(image_url(self.recipe.id), {'image': ntf}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(self.recipe.image_thumbnail)
+
+    def test_reupload_removes_previous_files(self):
+        self.upload(Image.new('RGB', (20, 20)))
+        self.recipe.refresh_from_db()
+        old_paths = [self.recipe.image.path, self.recipe.image_thumbnail.path]
+
+        self.upload(Image.new('RGB', (30, 30)))
+
+        for path in old_paths:
+            self.assertFalse(os.path.exists(path))
+
+    def test_name_chosen_by_storage_kept(self):
+        storage = self.recipe.image.storage
+        save = storage.save
+
+        def save_renamed(name, content, max_length=None):
+            return save(name.replace('.', '-renamed.'), content, max_length)
+
+        with patch.object(storage, 'save', side_effect=save_renamed):
+            self.upload(Image.new('RGB', (20, 20)))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertTrue(self.recipe.image.name.endswith('-renamed-renamed.jpg'))
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+
+    def test_detail_exposes_renditions(self):
+        self.upload(Image.new('RGB', (20, 20)))
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.assertEqual(set(res.data['renditions']), {'thumbnail', 'medium', 'webp'})
+        self.assertTrue(res.data['renditions']['thumbnail'].startswith('http://testserver/'))
+
+
+class RecipeImageSchedulingTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.recipe = Recipe.objects.create(user=user, title='Pav Bhaji', time_minutes=5, price=5.00)
+        self.recipe.image.name = 'uploads/recipe/test.jpg'
+
+    @patch('recipe.images.transaction.on_commit')
+    def test_processing_deferred_to_commit(self, on_commit):
+        with patch('recipe.images.get_executor') as get_executor:
+            images.schedule_processing(self.recipe)
+            get_executor.assert_not_called()
+
+            on_commit.call_args[0][0]()
+
+        get_executor.return_value.submit.assert_called_once_with(images._run_job, self.recipe.id, 'uploads/recipe/test.jpg')
+
+    def test_stale_job_ignored(self):
+        with patch('recipe.images.Image.open') as image_open:
+            images.process_image(self.recipe.id, 'uploads/recipe/replaced.jpg')
+
+        image_open.assert_not_called()
+
+
+class ProcessPendingImagesTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.recipes = []
+        for title in ('Pav Bhaji', 'Vada Pav'):
+            recipe = Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+            buffer = io.BytesIO()
+            Image.new('RGB', (20, 20)).save(buffer, format='JPEG')
+            recipe.image.save('image.jpg', ContentFile(buffer.getvalue()), save=False)
+            recipe.image_status = Recipe.IMAGE_PENDING
+            recipe.save()
+            self.recipes.append(recipe)
+
+    def tearDown(self):
+        for recipe in self.recipes:
+            recipe.refresh_from_db()
+            images.delete_image_files(recipe)
+
+    def test_processes_stuck_images_only(self):
+        stuck, recent = self.recipes
+        Recipe.objects.filter(id=stuck.id).update(
+            image_status=Recipe.IMAGE_PROCESSING, updated_at=timezone.now() - timedelta(hours=1),
+        )
+        out = StringIO()
+
+        call_command('process_pending_images', stdout=out)
+
+        stuck.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stuck.image_status, Recipe.IMAGE_READY)
+        self.assertTrue(stuck.image_thumbnail)
+        self.assertEqual(recent.image_status, Recipe.IMAGE_PENDING)
+        self.assertIn('Processed 1 images', out.getvalue())
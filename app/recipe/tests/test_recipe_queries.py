@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipes(user, count, relations=3):
+    recipes = []
+    for i in range(count):
+        recipe = Recipe.objects.create(user=user, title=f'Recipe {i}', time_minutes=10, price=5.00)
+        for j in range(relations):
+            recipe.tags.add(Tag.objects.create(user=user, name=f'Tag {recipe.id}-{j}'))
+            recipe.ingredients.add(Ingredient.objects.create(user=user, name=f'Ingredient {recipe.id}-{j}'))
+        recipes.append(recipe)
+    return recipes
+
+
+class RecipeQueryCountTests(TestCase):
+    """Recipe reads must run a fixed number of queries regardless of size"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count_is_constant(self):
+        sample_recipes(self.user, 1)
+        with self.assertNumQueries(4):
+            self.client.get(RECIPE_URL)
+
+        sample_recipes(self.user, 20)
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 21)
+
+    def test_list_payload_unchanged(self):
+        sample_recipes(self.user, 5)
+
+        res = self.client.get(RECIPE_URL)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_detail_query_count_is_constant(self):
+        recipe, = sample_recipes(self.user, 1, relations=10)
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, RecipeDetailSerializer(recipe).data)
+
+    def test_filtered_list_query_count_is_constant(self):
+        recipes = sample_recipes(self.user, 10)
+        tag_ids = ','.join(str(recipe.tags.first().id) for recipe in recipes)
+
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL, {'tags': tag_ids})
+
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_upload_image_skips_prefetch(self):
+        recipe, = sample_recipes(self.user, 1)
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+
+        with self.assertNumQueries(1):
+            res = self.client.post(url, {'image': 'not an image'}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
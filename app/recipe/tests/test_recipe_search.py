@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeSearchTerm, Tag, Ingredient
+
+from recipe.cache import reset_response_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, title='Pav Bhaji'):
+    return Recipe.objects.create(user=user, title=title, time_minutes=5, price=5.00)
+
+
+class RecipeSearchTests(TestCase):
+
+    def setUp(self):
+        reset_response_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        reset_response_cache()
+
+    def search(self, text, **params):
+        res = self.client.get(RECIPES_URL, dict(params, search=text))
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_title(self):
+        sample_recipe(self.user, title='Pav Bhaji')
+        sample_recipe(self.user, title='Vada Pav')
+        sample_recipe(self.user, title='Misal')
+
+        self.assertEqual(sorted(self.search('pav')), ['Pav Bhaji', 'Vada Pav'])
+
+    def test_search_requires_every_word(self):
+        sample_recipe(self.user, title='Pav Bhaji')
+        sample_recipe(self.user, title='Vada Pav')
+
+        self.assertEqual(self.search('bhaji pav'), ['Pav Bhaji'])
+
+    def test_search_tag_and_ingredient_names(self):
+        recipe1 = sample_recipe(self.user, title='Pav Bhaji')
+        recipe2 = sample_recipe(self.user, title='Misal')
+        recipe1.tags.add(Tag.objects.create(user=self.user, name='Street Food'))
+        recipe2.ingredients.add(Ingredient.objects.create(user=self.user, name='Sprouts'))
+
+        self.assertEqual(self.search('street'), ['Pav Bhaji'])
+        self.assertEqual(self.search('sprouts'), ['Misal'])
+
+    def test_title_matches_rank_first(self):
+        tagged = sample_recipe(self.user, title='Misal')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Spicy'))
+        sample_recipe(self.user, title='Spicy Misal')
+
+        self.assertEqual(self.search('spicy'), ['Spicy Misal', 'Misal'])
+
+    def test_search_limited_to_user(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        sample_recipe(user2, title='Pav Bhaji')
+
+        self.assertEqual(self.search('pav'), [])
+
+    def test_search_combines_with_filters(self):
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        recipe = sample_recipe(self.user, title='Pav Bhaji')
+        recipe.tags.add(tag)
+        sample_recipe(self.user, title='Vada Pav')
+
+        self.assertEqual(self.search('pav', tags=tag.id), ['Pav Bhaji'])
+
+    def test_search_paginates_by_rank(self):
+        pav = Ingredient.objects.create(user=self.user, name='Pav')
+        for i in range(5):
+            recipe = sample_recipe(self.user, title=f'Pav {i}')
+            if i % 2:
+                recipe.ingredients.add(pav)
+
+        titles = []
+        res = self.client.get(RECIPES_URL, {'search': 'pav', 'page_size': 2})
+        while True:
+            titles.extend(recipe['title'] for recipe in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(titles, ['Pav 3', 'Pav 1', 'Pav 4', 'Pav 2', 'Pav 0'])
+
+    def test_index_follows_changes(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        recipe = sample_recipe(self.user, title='Pav Bhaji')
+        recipe.tags.add(tag)
+
+        tag.name = 'Sweet'
+        tag.save()
+        self.assertEqual(self.search('sweet'), ['Pav Bhaji'])
+
+        tag.delete()
+        self.assertEqual(self.search('sweet'), [])
+
+        recipe.title = 'Vada Pav'
+        recipe.save()
+        self.assertEqual(self.search('bhaji'), [])
+        self.assertEqual(self.search('vada'), ['Vada Pav'])
+
+    def test_bulk_writes_indexed(self):
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.client.post(BULK_URL, [
+            {'title': 'Pav Bhaji', 'time_minutes': 10, 'price': '5.00', 'tags': [tag.id]},
+        ], format='json')
+
+        self.assertEqual(self.search('spicy'), ['Pav Bhaji'])
+
+    def test_deleted_recipe_terms_removed(self):
+        recipe = sample_recipe(self.user, title='Pav Bhaji')
+
+        recipe.delete()
+
+        self.assertFalse(RecipeSearchTerm.objects.exists())
+
+    def test_blank_search_matches_nothing(self):
+        sample_recipe(self.user)
+
+        self.assertEqual(self.search('!!'), [])
@@ -0,0 +1,220 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+import time
+import zlib
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe import images, uploads
+
+
+STAGING_DIR = tempfile.mkdtemp()
+
+
+def image_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def chunked_url(recipe_id):
+    return reverse('recipe:recipe-upload-image-chunked', args=[recipe_id])
+
+
+def jpeg_bytes(size=(40, 40)):
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def forged_png(width, height):
+    """A few dozen bytes of PNG whose header claims ``width`` x ``height`` pixels"""
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', header) + png_chunk(b'IDAT', b'') + png_chunk(b'IEND', b'')
+
+
+class UploadTestMixin:
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Pav Bhaji', time_minutes=5, price=5.00)
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        images.delete_image_files(self.recipe)
+
+
+class LimitedImageUploadTests(UploadTestMixin, TestCase):
+
+    def upload(self, data):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            ntf.write(data)
+            ntf.seek(0)
+            return self.client.post(image_url(self.recipe.id), {'image': ntf}, format='multipart')
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=200 * 2 ** 10)
+    def test_oversized_request_rejected_before_parsing(self):
+        res = self.upload(b'\xff' * 400 * 2 ** 10)
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=80 * 2 ** 10)
+    def test_oversized_file_rejected_while_streaming(self):
+        res = self.upload(jpeg_bytes() + b'\0' * 120 * 2 ** 10)
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels_rejected(self):
+        res = self.upload(jpeg_bytes(size=(200, 100)))
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertIn('pixels', str(res.data['image'][0]))
+
+    def test_decompression_bomb_header_rejected(self):
+        res = self.upload(forged_png(20000, 20000))
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertIn('pixels', str(res.data['image'][0]))
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_not_an_image_rejected(self):
+        res = self.upload(b'sahil is king')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_valid_image_accepted(self):
+        res = self.upload(jpeg_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith('.jpg'))
+
+
+@override_settings(RECIPE_UPLOAD_STAGING_DIR=STAGING_DIR)
+class ChunkedImageUploadTests(UploadTestMixin, TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STAGING_DIR, ignore_errors=True)
+
+    def put_chunk(self, data, start, total):
+        end = start + len(data) - 1
+        return self.client.generic(
+            'PUT', chunked_url(self.recipe.id), data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}',
+        )
+
+    def test_chunked_upload_completes(self):
+        data = jpeg_bytes(size=(120, 120))
+        size = len(data) // 3 + 1
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+
+        for i, chunk in enumerate(chunks[:-1]):
+            res = self.put_chunk(chunk, i * size, len(data))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data['offset'], (i + 1) * size)
+        res = self.put_chunk(chunks[-1], (len(chunks) - 1) * size, len(data))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+        self.recipe.refresh_from_db()
+        with self.recipe.image.open('rb') as stored:
+            self.assertEqual(stored.read(), data)
+        self.assertEqual(self.client.get(chunked_url(self.recipe.id)).data['offset'], 0)
+
+    def test_resume_from_reported_offset(self):
+        data = jpeg_bytes()
+        self.put_chunk(data[:100], 0, len(data))
+
+        offset = self.client.get(chunked_url(self.recipe.id)).data['offset']
+        res = self.put_chunk(data[offset:], offset, len(data))
+
+        self.assertEqual(offset, 100)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+
+    def test_out_of_order_chunk_rejected(self):
+        data = jpeg_bytes()
+        self.put_chunk(data[:100], 0, len(data))
+
+        res = self.put_chunk(data[200:300], 200, len(data))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 100)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1000)
+    def test_declared_size_over_limit_rejected(self):
+        res = self.put_chunk(b'\xff' * 100, 0, 5000)
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(res.data['offset'], 0)
+
+    def test_missing_content_range_rejected(self):
+        res = self.client.generic('PUT', chunked_url(self.recipe.id), b'data', content_type='application/octet-stream')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_image_discarded(self):
+        res = self.put_chunk(b'sahil is king', 0, 13)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(chunked_url(self.recipe.id)).data['offset'], 0)
+
+    def test_decompression_bomb_header_rejected(self):
+        data = forged_png(20000, 20000)
+
+        res = self.put_chunk(data, 0, len(data))
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(self.client.get(chunked_url(self.recipe.id)).data['offset'], 0)
+
+    def test_discard_upload(self):
+        data = jpeg_bytes()
+        self.put_chunk(data[:100], 0, len(data))
+
+        res = self.client.delete(chunked_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(chunked_url(self.recipe.id)).data['offset'], 0)
+
+    @patch('recipe.uploads._next_sweep', 0.0)
+    def test_abandoned_uploads_removed(self):
+        abandoned = os.path.join(STAGING_DIR, 'abandoned.part')
+        recent = os.path.join(STAGING_DIR, 'recent.part')
+        for path in (abandoned, recent):
+            with open(path, 'wb') as staged:
+                staged.write(b'\xff\xd8')
+        two_days_ago = time.time() - 2 * 24 * 60 * 60
+        os.utime(abandoned, (two_days_ago, two_days_ago))
+
+        self.client.get(chunked_url(self.recipe.id))
+
+        self.assertFalse(os.path.exists(abandoned))
+        self.assertTrue(os.path.exists(recent))
+        self.assertGreater(uploads._next_sweep, time.monotonic())
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.cache import reset_response_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+
+    def setUp(self):
+        reset_response_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Pav Bhaji', time_minutes=5, price=5.00)
+        self.tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.ingredient = Ingredient.objects.create(user=self.user, name='Potato')
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def tearDown(self):
+        reset_response_cache()
+
+    def test_list_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [{'id': self.recipe.id, 'title': 'Pav Bhaji'}])
+        # The version lookup and the recipes, without any relation prefetch.
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"price"', queries[1]['sql'])
+
+    def test_list_expand(self):
+        res = self.client.get(RECIPES_URL, {'expand': 'tags'})
+
+        recipe = res.data['results'][0]
+        self.assertEqual(recipe['tags'], [{'id': self.tag.id, 'name': 'Spicy'}])
+        self.assertEqual(recipe['ingredients'], [self.ingredient.id])
+
+    def test_list_fields_with_expand(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'title,ingredients', 'expand': 'ingredients'})
+
+        self.assertEqual(res.data['results'], [
+            {'title': 'Pav Bhaji', 'ingredients': [{'id': self.ingredient.id, 'name': 'Potato'}]},
+        ])
+
+    def test_detail_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(detail_url(self.recipe.id), {'fields': 'title,renditions'})
+
+        self.assertEqual(res.data, {
+            'title': 'Pav Bhaji',
+            'renditions': {'thumbnail': None, 'medium': None, 'webp': None},
+        })
+        self.assertEqual(len(queries), 2)
+
+    def test_fields_keep_pagination(self):
+        Recipe.objects.create(user=self.user, title='Vada Pav', time_minutes=5, price=5.00)
+
+        first = self.client.get(RECIPES_URL, {'fields': 'title', 'page_size': 1})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(first.data['results'], [{'title': 'Vada Pav'}])
+        self.assertEqual(second.data['results'], [{'title': 'Pav Bhaji'}])
+
+    def test_unknown_field(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'title,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_unknown_expand(self):
+        res = self.client.get(RECIPES_URL, {'expand': 'user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', res.data)
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -11,6 +13,21 @@ from recipe.serializers import TagSerializer
 
 
 TAG_URL = reverse('recipe:tag-list')
+UPSERT_URL = reverse('recipe:tag-upsert')
+
+ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def use_unicode_lower(testcase):
+    """Make SQLite's ASCII only ``LOWER`` fold case per code point, as PostgreSQL does"""
+    connection.ensure_connection()
+    connection.connection.create_function(
+        'LOWER', 1, lambda value: value and ''.join(char.lower()[0] for char in value), deterministic=True,
+    )
+    testcase.addCleanup(
+        connection.connection.create_function,
+        'LOWER', 1, lambda value: value and value.translate(ASCII_LOWER), deterministic=True,
+    )
 
 
 class PublicTagsApisTests(TestCase):
@@ -41,7 +58,7 @@ class PrivateTagsApiTest(TestCase):
         res = self.client.get(TAG_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
@@ -51,8 +68,8 @@ class PrivateTagsApiTest(TestCase):
         res = self.client.get(TAG_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_creste_tag_successful(self):
         payload = {'name': 'Gujarati'}
@@ -61,6 +78,60 @@ class PrivateTagsApiTest(TestCase):
         exists = Tag.objects.filter(user=self.user, name=payload['name']).exists()
         self.assertTrue(exists)
 
+    def test_create_existing_tag_returns_it(self):
+        tag = Tag.objects.create(user=self.user, name='Gujarati')
+
+        res = self.client.post(TAG_URL, {'name': 'gujarati'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'id': tag.id, 'name': 'Gujarati'})
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_upsert_tags(self):
+        spicy = Tag.objects.create(user=self.user, name='Spicy')
+
+        res = self.client.post(UPSERT_URL, {'names': ['Sweet', 'spicy', 'SWEET', 'Hot']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag['name'] for tag in res.data['results']]
+        self.assertEqual(names, ['Sweet', 'Spicy', 'Sweet', 'Hot'])
+        self.assertEqual(res.data['results'][1]['id'], spicy.id)
+        self.assertEqual(res.data['results'][0]['id'], res.data['results'][2]['id'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+
+    def test_upsert_tags_non_ascii(self):
+        """Python lowercases "İ" to two code points, the database to one"""
+        use_unicode_lower(self)
+        tag = Tag.objects.create(user=self.user, name='istanbul')
+
+        res = self.client.post(UPSERT_URL, {'names': ['İSTANBUL', 'Çay', 'ÇAY']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [tag['id'] for tag in res.data['results']]
+        self.assertEqual(ids[0], tag.id)
+        self.assertEqual(ids[1], ids[2])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_upsert_tags_is_idempotent(self):
+        first = self.client.post(UPSERT_URL, {'names': ['Sweet', 'Hot']}, format='json')
+        second = self.client.post(UPSERT_URL, {'names': ['Sweet', 'Hot']}, format='json')
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_upsert_tags_scoped_to_user(self):
+        user2 = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        other = Tag.objects.create(user=user2, name='Spicy')
+
+        res = self.client.post(UPSERT_URL, {'names': ['Spicy']}, format='json')
+
+        self.assertNotEqual(res.data['results'][0]['id'], other.id)
+
+    def test_upsert_tags_invalid(self):
+        res = self.client.post(UPSERT_URL, {'names': []}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_tag_invalid(self):
         payload = {'name': ''}
         res = self.client.post(TAG_URL, payload)
@@ -82,8 +153,8 @@ class PrivateTagsApiTest(TestCase):
 
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         tag = Tag.objects.create(user=self.user, name='Street Food')
@@ -105,4 +176,48 @@ class PrivateTagsApiTest(TestCase):
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_assigned_tags_without_distinct(self):
+        tag = Tag.objects.create(user=self.user, name='Street Food')
+        for title in ('Pav Bhaji', 'Masala Pav'):
+            recipe = Recipe.objects.create(title=title, time_minutes=30, price=110, user=self.user)
+            recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TAG_URL, {'assigned_only': 1})
+
+        # The collection version lookup plus the tag query itself.
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('DISTINCT', queries[1]['sql'])
+        self.assertEqual(res.data['results'], [TagSerializer(tag).data])
+
+    def test_retrieve_tags_with_counts(self):
+        spicy = Tag.objects.create(user=self.user, name='Spicy')
+        street = Tag.objects.create(user=self.user, name='Street Food')
+        recipe = Recipe.objects.create(title='Pav Bhaji', time_minutes=30, price=110, user=self.user)
+        recipe.tags.add(spicy, street)
+        recipe2 = Recipe.objects.create(title='Vada Pav', time_minutes=30, price=110, user=self.user)
+        recipe2.tags.add(street)
+
+        res = self.client.get(TAG_URL, {'with_counts': 1})
+
+        self.assertEqual(res.data['results'], [
+            {'id': street.id, 'name': street.name, 'recipe_count': 2},
+            {'id': spicy.id, 'name': spicy.name, 'recipe_count': 1},
+        ])
+
+    def test_flags_accept_true_and_false(self):
+        Tag.objects.create(user=self.user, name='Spicy')
+
+        counted = self.client.get(TAG_URL, {'with_counts': 'true'})
+        plain = self.client.get(TAG_URL, {'with_counts': 'false', 'assigned_only': 'False'})
+
+        self.assertEqual(counted.data['results'][0]['recipe_count'], 0)
+        self.assertNotIn('recipe_count', plain.data['results'][0])
+
+    def test_invalid_flag_rejected(self):
+        res = self.client.get(TAG_URL, {'with_counts': 'maybe'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('with_counts', res.data)
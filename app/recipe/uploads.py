@@ -0,0 +1,237 @@
+import io
+import os
+import re
+import tempfile
+import time
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+
+
+CHUNK_SIZE = 64 * 2 ** 10
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def max_image_bytes():
+    return getattr(settings, 'RECIPE_IMAGE_MAX_BYTES', 10 * 2 ** 20)
+
+
+def max_image_pixels():
+    return getattr(settings, 'RECIPE_IMAGE_MAX_PIXELS', 40 * 10 ** 6)
+
+
+def max_header_bytes():
+    return getattr(settings, 'RECIPE_IMAGE_HEADER_BYTES', 256 * 2 ** 10)
+
+
+def staging_max_age():
+    return getattr(settings, 'RECIPE_UPLOAD_STAGING_MAX_AGE', 24 * 60 * 60)
+
+
+class UploadRejected(Exception):
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def check_size(size):
+    if size > max_image_bytes():
+        raise UploadRejected(
+            _('Image exceeds the maximum size of %(max)d bytes.') % {'max': max_image_bytes()},
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+
+
+def check_header(data, complete=False):
+    """Check the image dimensions from the first bytes of the file
+
+    ``Image.open`` is lazy and only parses the header, so no pixel data is
+    decoded. Returns the image format, or ``None`` while more bytes are
+    needed to find the header, and raises ``UploadRejected`` when the image
+    is not acceptable.
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        # Pillow's own limit is far above ours, so the image is too large either way.
+        raise too_many_pixels()
+    except (OSError, SyntaxError, ValueError):
+        if complete or len(data) >= max_header_bytes():
+            raise UploadRejected(_('Upload a valid image.'))
+        return None
+
+    width, height = img.size
+    if width * height > max_image_pixels():
+        raise too_many_pixels()
+    return img.format
+
+
+def too_many_pixels():
+    return UploadRejected(
+        _('Image exceeds the maximum of %(max)d pixels.') % {'max': max_image_pixels()},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    )
+
+
+class LimitedImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream an uploaded image to a temporary file while enforcing limits
+
+    The byte limit is checked on every chunk and the dimensions as soon as
+    the header has arrived, so an oversized file is dropped without reading
+    the rest of it into the temporary file. Storing the upload later moves
+    the temporary file into place instead of copying it through memory.
+    """
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.error = None
+        self.received = 0
+        self.header = b''
+        self.header_checked = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.header_checked = None
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.received += len(raw_data)
+            check_size(self.received)
+            if not self.header_checked:
+                self.header += raw_data
+                self.header_checked = check_header(self.header)
+        except UploadRejected as exc:
+            self.error = exc
+            self.file.close()
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.header_checked:
+            try:
+                check_header(self.header, complete=True)
+            except UploadRejected as exc:
+                self.error = exc
+                self.file.close()
+                return None
+        return super().file_complete(file_size)
+
+
+def install_upload_handler(request):
+    """Replace the upload handlers of ``request`` before its body is parsed"""
+    content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    # Multipart framing adds a little on top of the file itself.
+    check_size(content_length - CHUNK_SIZE)
+    handler = LimitedImageUploadHandler(request)
+    request.upload_handlers = [handler]
+    return handler
+
+
+# Staged uploads are swept at most this often, in seconds, per process.
+STAGING_SWEEP_INTERVAL = 60 * 60
+_next_sweep = 0.0
+
+
+def discard_stale_uploads(directory):
+    """Remove staged uploads nothing was appended to for ``staging_max_age()`` seconds"""
+    cutoff = time.time() - staging_max_age()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.name.endswith('.part') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class ChunkedUpload:
+    """A resumable upload staged on local disk, one per recipe
+
+    Clients send the file in consecutive ``Content-Range`` chunks and can ask
+    for the current offset to resume after a dropped connection. Uploads
+    abandoned for longer than ``RECIPE_UPLOAD_STAGING_MAX_AGE`` are removed
+    the next time any upload is touched.
+    """
+
+    def __init__(self, recipe):
+        global _next_sweep
+        directory = getattr(
+            settings, 'RECIPE_UPLOAD_STAGING_DIR',
+            os.path.join(tempfile.gettempdir(), 'recipe-uploads'),
+        )
+        os.makedirs(directory, exist_ok=True)
+        if time.monotonic() >= _next_sweep:
+            _next_sweep = time.monotonic() + STAGING_SWEEP_INTERVAL
+            discard_stale_uploads(directory)
+        self.path = os.path.join(directory, f'{recipe.pk}.part')
+        self.format = None
+
+    @property
+    def offset(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def append(self, content_range, stream):
+        """Append one chunk and return ``True`` once the file is complete"""
+        match = CONTENT_RANGE_RE.match(content_range or '')
+        if not match:
+            raise UploadRejected(_('A "Content-Range: bytes start-end/total" header is required.'))
+        start, end, total = (int(value) for value in match.groups())
+        check_size(total)
+        if start > end or end >= total:
+            raise UploadRejected(_('Invalid Content-Range.'))
+        if start != self.offset:
+            raise UploadRejected(
+                _('Expected a chunk starting at byte %(offset)d.') % {'offset': self.offset},
+                status.HTTP_409_CONFLICT,
+            )
+
+        remaining = end - start + 1
+        with open(self.path, 'ab') as staged:
+            while remaining:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                staged.write(chunk)
+                remaining -= len(chunk)
+        if remaining:
+            with open(self.path, 'ab') as staged:
+                staged.truncate(start)
+            raise UploadRejected(_('Chunk is shorter than its Content-Range.'))
+
+        self._check_header(complete=end + 1 == total)
+        return end + 1 == total
+
+    def _check_header(self, complete):
+        with open(self.path, 'rb') as staged:
+            header = staged.read(max_header_bytes())
+        try:
+            self.format = check_header(header, complete=complete)
+        except UploadRejected:
+            self.discard()
+            raise
+
+    def save_to(self, recipe):
+        """Copy the staged file into ``recipe.image`` in fixed size chunks"""
+        with open(self.path, 'rb') as staged:
+            recipe.image.save(f'image.{self.format.lower()}', File(staged), save=False)
+        self.discard()
@@ -1,69 +1,184 @@
+import io
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.translation import gettext_lazy as _
+
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+
+from core.models import CollectionVersion, Tag, Ingredient, Recipe
 
-from core.models import Tag, Ingredient, Recipe
+from user.authentication import CachedTokenAuthentication
 
-from recipe.serializers import TagSerializer, IngredientSerializer, RecipeSerializer, RecipeDetailSerializer, RecipeImageSerializer
+from recipe import bulk, images, uploads
+from recipe.autocomplete import get_prefix_index
+from recipe.cache import CachedResponseMixin, get_response_cache
+from recipe.conditional import ConditionalGetMixin
+from recipe.export import EXPORT_FORMATS, export_plan, iter_recipes, stream_json, stream_ndjson
+from recipe.flat import FlatReadMixin
+from recipe.pagination import RecipePagination, RecipeAttrPagination
+from recipe.search import get_search_backend
+from recipe.serializers import TagSerializer, IngredientSerializer, RecipeSerializer, RecipeDetailSerializer, RecipeImageSerializer, \
+    TagCountSerializer, IngredientCountSerializer, NameBatchSerializer, recipe_columns, related_prefetch_fields, \
+    RECIPE_RELATIONS
 
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin):
+class BaseRecipeAttrViewSet(ConditionalGetMixin, FlatReadMixin, viewsets.GenericViewSet, mixins.ListModelMixin,
+                            mixins.CreateModelMixin):
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttrPagination
+
+    def _flag(self, param):
+        value = self.request.query_params.get(param, '').strip().lower()
+        if value in ('', '0', 'false'):
+            return False
+        if value in ('1', 'true'):
+            return True
+        raise ValidationError({param: _('Expected 0, 1, true or false.')})
 
     def get_queryset(self):
-        assigned_only = bool(int(self.request.query_params.get('assigned_only', 0)))
         queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        if self._flag('assigned_only'):
+            queryset = queryset.assigned()
+        if self._flag('with_counts'):
+            queryset = queryset.with_recipe_counts()
 
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+        return self.flat_queryset(queryset.filter(user=self.request.user).order_by('-name', '-id'))
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def get_version_collections(self):
+        # Which names are assigned, and how often, changes with the recipes.
+        if self._flag('assigned_only') or self._flag('with_counts'):
+            return self.version_collections + (CollectionVersion.RECIPES,)
+        return self.version_collections
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self._flag('with_counts'):
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    def create(self, request, *args, **kwargs):
+        """Return the existing object when the name is already taken, ignoring case"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.instance, created = self.queryset.get_or_create_name(request.user, serializer.validated_data['name'])
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @action(methods=['POST'], detail=False, url_path='upsert')
+    def upsert(self, request):
+        """Get or create a batch of names in one go, answering with their ids in order"""
+        serializer = NameBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        objs = self.queryset.upsert_names(request.user, serializer.validated_data['names'])
+        return Response({'results': self.serializer_class(objs, many=True).data})
+
+    @action(methods=['GET'], detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        """The most used names starting with ``?q=``, at most ``?limit=``"""
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': _('Expected an integer.')})
+        limit = max(1, min(limit, getattr(settings, 'RECIPE_AUTOCOMPLETE_MAX_LIMIT', 50)))
+
+        collections = self.version_collections + (CollectionVersion.RECIPES,)
+        index = get_prefix_index(self.queryset, request.user.pk, collections)
+        matches = index.complete(request.query_params.get('q', ''), limit)
+        return Response(self.count_serializer_class(matches, many=True).data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    count_serializer_class = TagCountSerializer
+    version_collections = (CollectionVersion.TAGS,)
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    count_serializer_class = IngredientCountSerializer
+    version_collections = (CollectionVersion.INGREDIENTS,)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, CachedResponseMixin, FlatReadMixin, viewsets.ModelViewSet):
 
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    # Recipe details embed tag and ingredient names.
+    version_collections = (CollectionVersion.RECIPES, CollectionVersion.TAGS, CollectionVersion.INGREDIENTS)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipePagination
 
-    def _params_to_ints(self, qs):
-        return [int(int_str) for int_str in qs.split(',')]
+    filter_modes = ('any', 'all')
+    sparse_actions = ('list', 'retrieve')
 
-    def get_queryset(self):
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
+    def _params_to_ints(self, qs, param):
+        try:
+            return [int(int_str) for int_str in qs.split(',')]
+        except ValueError:
+            raise ValidationError({param: _('Expected a comma separated list of ids.')})
+
+    def _filter_mode(self, param):
+        mode = self.request.query_params.get(param, 'any')
+        if mode not in self.filter_modes:
+            raise ValidationError({param: _('Expected one of: any, all.')})
+        return mode == 'all'
+
+    def filter_recipes(self):
+        """The user's recipes matching the tag, ingredient and search filters"""
         queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredients_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_ids)
-        return queryset.filter(user=self.request.user).order_by('-id')
+        for relation in RECIPE_RELATIONS:
+            ids = self.request.query_params.get(relation)
+            if ids:
+                match_all = self._filter_mode(f'{relation}_mode')
+                queryset = queryset.filter_related(relation, self._params_to_ints(ids, relation), match_all)
+        queryset = queryset.filter(user=self.request.user).order_by('-id')
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = get_search_backend().search(queryset, search).order_by('-search_rank', '-id')
+        return queryset
+
+    def get_queryset(self):
+        queryset = self.filter_recipes()
+        if self.action not in self.sparse_actions:
+            return queryset.with_relations(related_prefetch_fields(self.get_serializer_class()))
+        # Reads load only the columns and relations the requested fields use.
+        serializer = self.get_serializer()
+        flat = self.flat_queryset(queryset, serializer)
+        if flat is not queryset:
+            return flat
+        columns = recipe_columns(serializer)
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset.with_relations(related_prefetch_fields(serializer))
+
+    def _query_list(self, param):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            kwargs['fields'] = self._query_list('fields')
+            kwargs['expand'] = self._query_list('expand') or ()
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return RecipeDetailSerializer
-        elif self.action == 'upload_image':
+        elif self.action in ('upload_image', 'upload_image_chunked'):
             return RecipeImageSerializer
 
         return self.serializer_class
@@ -71,21 +186,87 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(methods=['GET'], detail=False, url_path='cache-stats', permission_classes=(IsAdminUser,))
+    def cache_stats(self, request):
+        return Response(get_response_cache().stats())
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream every matching recipe as NDJSON, or as a JSON array with ``?as=json``"""
+        output = request.query_params.get('as', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'as': _('Expected one of: ndjson, json.')})
+        content_type, extension = EXPORT_FORMATS[output]
+
+        plan = export_plan(self.get_serializer_context())
+        chunks = iter_recipes(self.filter_recipes(), plan, request)
+        stream = stream_json(chunks) if output == 'json' else stream_ndjson(chunks)
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="recipes.{extension}"'
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            ids = request.data.get('ids') if isinstance(request.data, dict) else None
+            return Response(bulk.bulk_delete(request.user, ids), status=status.HTTP_200_OK)
+
+        write = bulk.bulk_create if request.method == 'POST' else bulk.bulk_update
+        data, response_status = write(request.user, request.data)
+        return Response(data, status=response_status)
+
+    def _upload_rejected(self, exc, **extra):
+        return Response(dict({'image': [exc.message]}, **extra), status=exc.status_code)
+
+    def _image_accepted(self, recipe):
+        images.schedule_processing(recipe)
+        serializer = RecipeImageSerializer(recipe, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         recipe = self.get_object()
+        try:
+            handler = uploads.install_upload_handler(request._request)
+        except uploads.UploadRejected as exc:
+            return self._upload_rejected(exc)
+
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
+        if handler.error:
+            return self._upload_rejected(handler.error)
 
         if serializer.is_valid():
+            images.reset_image(recipe)
             serializer.save()
-            return Response(
-                serializer.data,
-                status=status.HTTP_200_OK,
-            )
+            return self._image_accepted(recipe)
         return Response(
             serializer.errors,
             status=status.HTTP_401_UNAUTHORIZED
         )
+
+    @action(methods=['GET', 'PUT', 'DELETE'], detail=True, url_path='upload-image/chunked')
+    def upload_image_chunked(self, request, pk=None):
+        """Resumable upload: PUT consecutive Content-Range chunks, GET the offset"""
+        recipe = self.get_object()
+        upload = uploads.ChunkedUpload(recipe)
+        if request.method == 'GET':
+            return Response({'offset': upload.offset})
+        if request.method == 'DELETE':
+            upload.discard()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        try:
+            complete = upload.append(request.META.get('HTTP_CONTENT_RANGE'), request.stream or io.BytesIO())
+        except uploads.UploadRejected as exc:
+            return self._upload_rejected(exc, offset=upload.offset)
+        if not complete:
+            return Response({'offset': upload.offset})
+
+        images.reset_image(recipe)
+        upload.save_to(recipe)
+        recipe.save()
+        return self._image_accepted(recipe)
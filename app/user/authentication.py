@@ -0,0 +1,125 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import LRUCache
+from user import tokens
+
+
+class TokenCache:
+    """Two level token -> (user, token) cache
+
+    Lookups go to an in-process LRU first and then, when
+    ``TOKEN_AUTH_CACHE_ALIAS`` names a Django cache, to that shared backend.
+    Deleting a token or saving its user evicts the entry here and from the
+    shared backend, but every other worker process keeps its own copy until
+    it expires. ``TOKEN_AUTH_CACHE_TTL``, 5 seconds by default, is therefore
+    how long a deleted token or deactivated user can still authenticate on
+    another worker.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(
+            maxsize=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000),
+            ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 5),
+        )
+        alias = getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None)
+        self.shared = caches[alias] if alias else None
+        self.shared_ttl = getattr(settings, 'TOKEN_AUTH_SHARED_CACHE_TTL', 300)
+
+    def _shared_key(self, key):
+        return 'token-auth:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(self._shared_key(key))
+            if entry is not None:
+                self.local.set(key, entry)
+        return entry
+
+    def set(self, key, entry):
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), entry, self.shared_ttl)
+
+    def delete_many(self, keys):
+        self.local.delete_many(keys)
+        if self.shared is not None:
+            self.shared.delete_many([self._shared_key(key) for key in keys])
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache()
+    return _token_cache
+
+
+def reset_token_cache():
+    global _token_cache
+    _token_cache = None
+
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that answers hot tokens without touching the database
+
+    Signed tokens from ``user.tokens`` are verified from their signature,
+    the revocation index and a cached copy of the user. Legacy ``authtoken``
+    keys are looked up as before while ``AUTH_TOKEN_ACCEPT_LEGACY`` is on.
+    """
+
+    def authenticate_credentials(self, key):
+        if tokens.is_signed_token(key):
+            return self.authenticate_signed(key)
+        if not getattr(settings, 'AUTH_TOKEN_ACCEPT_LEGACY', True):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        cache = get_token_cache()
+        entry = cache.get(key)
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            cache.set(key, entry)
+
+        # Every request gets its own user instance so one view changing it
+        # can never leak into another request served from the same entry.
+        user, token = entry
+        return copy.copy(user), token
+
+    def authenticate_signed(self, key):
+        try:
+            token = tokens.read_token(key)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_('Token expired.'))
+        except (signing.BadSignature, ValueError):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if tokens.get_revocation_index().is_revoked(token.jti):
+            raise exceptions.AuthenticationFailed(_('Token revoked.'))
+
+        cache = get_token_cache()
+        cache_key = user_cache_key(token.user_id)
+        user = cache.get(cache_key)
+        if user is None:
+            user = get_user_model().objects.filter(pk=token.user_id).first()
+            if user is None or not user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            cache.set(cache_key, user)
+        if not constant_time_compare(token.password_hash, tokens.password_hash(user)):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return copy.copy(user), token
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import get_token_cache, user_cache_key
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    get_token_cache().delete_many([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_user_tokens(sender, instance, **kwargs):
+    """Drop cached tokens whenever a user changes
+
+    Saving a user covers deactivation and password changes, and the cached
+    copy of the user would otherwise be stale anyway.
+    """
+    keys = list(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+    get_token_cache().delete_many(keys + [user_cache_key(instance.pk)])
@@ -0,0 +1,115 @@
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, get_token_cache, reset_token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        reset_token_cache()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        reset_token_cache()
+
+    def test_hot_token_skips_database(self):
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'email': self.user.email})
+
+    def test_invalid_token_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(get_token_cache().local), 0)
+
+    def test_deleted_token_rejected(self):
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_evicts_token(self):
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'password': 'sahilsahil'})
+
+        self.assertIsNone(get_token_cache().get(self.token.key))
+
+    def test_cached_user_not_shared_between_requests(self):
+        self.client.get(ME_URL)
+
+        user, _ = get_token_cache().get(self.token.key)
+        res = self.client.get(ME_URL)
+
+        self.assertIsNot(res.wsgi_request.user, user)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_used_after_local_miss(self):
+        reset_token_cache()
+        self.client.get(ME_URL)
+
+        get_token_cache().local.clear()
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_invalidated(self):
+        reset_token_cache()
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        get_token_cache().local.clear()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_process_stops_serving_deleted_token_after_ttl(self):
+        key = self.token.key
+        other_process = TokenCache()
+        self.client.get(ME_URL)
+        other_process.set(key, get_token_cache().get(key))
+
+        self.token.delete()
+
+        self.assertIsNone(get_token_cache().get(key))
+        self.assertIsNotNone(other_process.get(key))
+        self.assertEqual(other_process.local.ttl, 5)
+        with patch('core.cache.time.monotonic', return_value=time.monotonic() + 5):
+            self.assertIsNone(other_process.get(key))
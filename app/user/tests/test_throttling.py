@@ -0,0 +1,134 @@
+import base64
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.throttling import LocalWindows, SharedWindows, parse_rate, reset_throttle_windows
+
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+
+
+class WindowTests(SimpleTestCase):
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/min'), (5, 60))
+        self.assertEqual(parse_rate('20/hour'), (20, 3600))
+
+    def test_local_sliding_window(self):
+        windows = LocalWindows(maxsize=10)
+
+        self.assertEqual(windows.hit('a', 2, 60, now=100), 0)
+        self.assertEqual(windows.hit('a', 2, 60, now=130), 0)
+        self.assertEqual(windows.hit('a', 2, 60, now=150), 10)
+        self.assertEqual(windows.hit('b', 2, 60, now=150), 0)
+        # The request at 100 has left the window, the one at 130 has not.
+        self.assertEqual(windows.hit('a', 2, 60, now=160), 0)
+        self.assertEqual(windows.hit('a', 2, 60, now=170), 20)
+
+    def test_shared_sliding_window(self):
+        cache = caches['default']
+        cache.clear()
+        windows = SharedWindows(cache)
+
+        for now in (10, 20, 50):
+            self.assertEqual(windows.hit('a', 3, 60, now=now), 0)
+        self.assertEqual(windows.hit('a', 3, 60, now=55), 5)
+        # The previous window still counts for the part that overlaps.
+        self.assertEqual(windows.hit('a', 3, 60, now=90), 0)
+        self.assertEqual(windows.hit('a', 3, 60, now=91), 0)
+        self.assertGreater(windows.hit('a', 3, 60, now=92), 0)
+
+
+class AuthThrottleTests(TestCase):
+
+    def setUp(self):
+        reset_throttle_windows()
+        self.client = APIClient()
+        get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+
+    def tearDown(self):
+        reset_throttle_windows()
+
+    def login(self, email='sahil@sahil.com', password='wrong', **extra):
+        return self.client.post(TOKEN_URL, {'email': email, 'password': password}, **extra)
+
+    @override_settings(AUTH_THROTTLE_RATES={'login_email': '3/min'})
+    def test_login_email_throttled_before_hashing(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+
+        with patch('core.hashing.HashingExecutor.run') as run:
+            res = self.login(email='SAHIL@sahil.com ', password='sahil123')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        run.assert_not_called()
+        self.assertEqual(self.login(email='test@test.com').status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(AUTH_THROTTLE_RATES={'login_ip': '1/min'})
+    def test_basic_auth_header_not_checked_before_throttling(self):
+        credentials = base64.b64encode(b'sahil@sahil.com:sahil123').decode()
+        self.login()
+
+        with patch('core.hashing.HashingExecutor.run') as run:
+            res = self.login(HTTP_AUTHORIZATION=f'Basic {credentials}')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        run.assert_not_called()
+
+    @override_settings(AUTH_THROTTLE_RATES={'login_ip': '2/min'})
+    def test_login_ip_throttled(self):
+        self.login(email='a@sahil.com')
+        self.login(email='b@sahil.com')
+
+        self.assertEqual(self.login(email='c@sahil.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(REMOTE_ADDR='10.0.0.2').status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(AUTH_THROTTLE_RATES={'login_ip': '2/min'})
+    def test_rotating_forwarded_for_still_throttled(self):
+        for i in range(2):
+            self.login(email=f'{i}@sahil.com', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+
+        res = self.login(email='c@sahil.com', HTTP_X_FORWARDED_FOR='10.0.0.9')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(AUTH_THROTTLE_RATES={'login_ip': '2/min'}, AUTH_THROTTLE_NUM_PROXIES=1)
+    def test_address_added_by_trusted_proxy(self):
+        for i in range(2):
+            self.login(email=f'{i}@sahil.com', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 192.0.2.1')
+
+        res = self.login(email='c@sahil.com', HTTP_X_FORWARDED_FOR='10.0.0.9, 192.0.2.1')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(HTTP_X_FORWARDED_FOR='192.0.2.2').status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(AUTH_THROTTLE_RATES={'signup_ip': '1/hour'})
+    def test_signup_ip_throttled(self):
+        res = self.client.post(CREATE_USER_URL, {'email': 'test@test.com', 'password': 'test123'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(CREATE_USER_URL, {'email': 'other@test.com', 'password': 'test123'})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(get_user_model().objects.filter(email='other@test.com').exists())
+
+    @override_settings(AUTH_THROTTLE_RATES={'login_ip': None, 'login_email': None})
+    def test_rate_none_disables(self):
+        for _ in range(10):
+            self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(AUTH_THROTTLE_CACHE_ALIAS='default', AUTH_THROTTLE_RATES={'login_email': '1/min'})
+    def test_shared_cache_backend(self):
+        caches['default'].clear()
+        self.login()
+
+        self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,188 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.bloom import BloomFilter
+from core.models import RevokedToken
+from user import tokens
+from user.authentication import reset_token_cache
+from user.throttling import reset_throttle_windows
+
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+REVOKE_URL = reverse('user:token-revoke')
+ME_URL = reverse('user:me')
+
+
+class BloomFilterTests(SimpleTestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+
+        self.assertEqual(len(bloom), 1000)
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TokenLifecycleTests(TestCase):
+
+    def setUp(self):
+        reset_token_cache()
+        reset_throttle_windows()
+        tokens.reset_revocation_index()
+        self.user = get_user_model().objects.create_user(email='sahil@sahil.com', password='sahil123')
+        self.client = APIClient()
+
+    def tearDown(self):
+        reset_token_cache()
+        tokens.reset_revocation_index()
+
+    def login(self):
+        res = self.client.post(TOKEN_URL, {'email': 'sahil@sahil.com', 'password': 'sahil123'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {res.data["token"]}')
+        return res.data['token']
+
+    def test_login_issues_signed_token(self):
+        key = self.login()
+
+        self.assertTrue(tokens.is_signed_token(key))
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(tokens.read_token(key).user_id, self.user.pk)
+
+    def test_warm_signed_token_skips_database(self):
+        self.login()
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'email': self.user.email})
+
+    def test_expired_token_rejected(self):
+        with override_settings(AUTH_TOKEN_TTL=60):
+            self.login()
+
+        with patch('user.tokens.time.time', return_value=tokens.time.time() + 61):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data['detail'], 'Token expired.')
+
+    def test_tampered_token_rejected(self):
+        key = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key[:-1]}{"A" if key[-1] != "A" else "B"}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_token(self):
+        old_key = self.login()
+
+        res = self.client.post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], old_key)
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {res.data["token"]}')
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_revoke_token(self):
+        self.login()
+
+        res = self.client.post(REVOKE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data['detail'], 'Token revoked.')
+
+    @override_settings(AUTH_TOKEN_REVOCATION_SYNC=0)
+    def test_revocation_from_another_process(self):
+        key = self.login()
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+        token = tokens.read_token(key)
+        RevokedToken.objects.create(jti=token.jti, expires_at=token.expires_at)
+
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rebuild_drops_expired_revocations(self):
+        token = tokens.issue_token(self.user)
+        tokens.revoke_token(token)
+        RevokedToken.objects.create(jti='expired', expires_at='2000-01-01T00:00:00Z')
+
+        index = tokens.RevocationIndex(sync_interval=0, rebuild_interval=0)
+
+        self.assertTrue(index.is_revoked(token.jti))
+        self.assertFalse(RevokedToken.objects.filter(jti='expired').exists())
+
+    def test_password_change_ends_tokens(self):
+        self.login()
+
+        self.user.set_password('changed123')
+        self.user.save()
+
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.login()
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_signing_key_rotation(self):
+        with override_settings(AUTH_TOKEN_SIGNING_KEYS=['old-key']):
+            self.login()
+
+        with override_settings(AUTH_TOKEN_SIGNING_KEYS=['new-key', 'old-key']):
+            self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+        with override_settings(AUTH_TOKEN_SIGNING_KEYS=['new-key']):
+            self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_legacy_token_still_accepted(self):
+        legacy = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {legacy.key}')
+
+        res = self.client.post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(tokens.is_signed_token(res.data['token']))
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_revoke_legacy_token(self):
+        legacy = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {legacy.key}')
+
+        self.client.post(REVOKE_URL)
+
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_ACCEPT_LEGACY=False)
+    def test_legacy_token_refused_when_disabled(self):
+        legacy = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {legacy.key}')
+
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -5,6 +7,10 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.hashing import HashingBusy
+
+from user.throttling import reset_throttle_windows
+
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
@@ -17,6 +23,7 @@ def create_user(**kwargs):
 class PublicUserApiTest(TestCase):
 
     def setUp(self):
+        reset_throttle_windows()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -58,6 +65,17 @@ class PublicUserApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertNotIn('token', res.data)
 
+    def test_token_hashing_busy(self):
+        payload = {'email': 'sahil@sahil.com', 'password': 'sahil123'}
+        create_user(**payload)
+
+        with patch('core.hashing.HashingExecutor.run', side_effect=HashingBusy):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Retry-After'], '1')
+        self.assertNotIn('token', res.data)
+
     def test_token_user_not_exist(self):
         payload = {'email': 'sahil@sahil.com', 'password': 'sahil123'}
         res = self.client.post(TOKEN_URL, payload)
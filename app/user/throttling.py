@@ -0,0 +1,180 @@
+import hashlib
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.throttling import BaseThrottle
+
+from core.cache import LRUCache
+
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'5/min'`` -> ``(5, 60)``, the same format as DRF's throttle rates"""
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class LocalWindows:
+    """Sliding window logs kept in this process
+
+    Every key holds a ring buffer of its last ``limit`` request times, so a
+    check is O(1) and memory per key is bounded by the limit. Keys idle for
+    a whole window expire, and at most ``maxsize`` keys are kept.
+    """
+
+    def __init__(self, maxsize):
+        self.windows = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, duration, now):
+        """Record a request for ``key``, or return the seconds until one is allowed"""
+        with self._lock:
+            times = self.windows.get(key)
+            if times is None or times.maxlen != limit:
+                times = deque(maxlen=limit)
+            if len(times) == limit and now - times[0] < duration:
+                return duration - (now - times[0])
+            times.append(now)
+            self.windows.set(key, times, ttl=duration)
+            return 0
+
+
+class SharedWindows:
+    """Sliding window counters in a Django cache shared by every process
+
+    The count of the current fixed window is added to the count of the
+    previous one, weighted by how much of it still overlaps the sliding
+    window. That takes two keys per client instead of a list of request times.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _key(self, key, window):
+        return f'auth-throttle:{hashlib.sha256(key.encode("utf-8")).hexdigest()}:{window}'
+
+    def hit(self, key, limit, duration, now):
+        window, elapsed = divmod(now, duration)
+        current_key, previous_key = self._key(key, int(window)), self._key(key, int(window) - 1)
+        counts = self.cache.get_many([current_key, previous_key])
+        current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+        remaining = duration - elapsed
+        if current >= limit:
+            return remaining
+        if previous * remaining / duration + current >= limit:
+            # The previous window's weight drops below what is left of the limit.
+            return max(remaining - (limit - current) * duration / previous, 1)
+
+        if not self.cache.add(current_key, 1, timeout=2 * duration):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, timeout=2 * duration)
+        return 0
+
+
+_windows = None
+_windows_lock = threading.Lock()
+
+
+def get_throttle_windows():
+    global _windows
+    with _windows_lock:
+        if _windows is None:
+            alias = getattr(settings, 'AUTH_THROTTLE_CACHE_ALIAS', None)
+            if alias:
+                _windows = SharedWindows(caches[alias])
+            else:
+                _windows = LocalWindows(getattr(settings, 'AUTH_THROTTLE_MAX_KEYS', 100000))
+        return _windows
+
+
+def reset_throttle_windows():
+    global _windows
+    with _windows_lock:
+        _windows = None
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Allow ``rate`` requests per client within any sliding window
+
+    Rates are read from ``AUTH_THROTTLE_RATES[scope]``, falling back to
+    ``default_rate``. A rate of ``None`` turns the throttle off. DRF checks
+    throttles before the view runs, so a rejected login costs no password
+    hash and no query.
+    """
+    scope = None
+    default_rate = None
+
+    def get_rate(self):
+        return getattr(settings, 'AUTH_THROTTLE_RATES', {}).get(self.scope, self.default_rate)
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0
+        rate = self.get_rate()
+        key = self.get_key(request, view) if rate else None
+        if key is None:
+            return True
+        limit, duration = parse_rate(rate)
+        self.wait_seconds = get_throttle_windows().hit(f'{self.scope}:{key}', limit, duration, time.time())
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Keyed on the client address
+
+    ``X-Forwarded-For`` is client controlled, so only the entries added by
+    the ``AUTH_THROTTLE_NUM_PROXIES`` proxies in front of the app are
+    trusted. With none, ``REMOTE_ADDR`` is used.
+    """
+
+    def get_key(self, request, view):
+        num_proxies = getattr(settings, 'AUTH_THROTTLE_NUM_PROXIES', 0)
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if num_proxies and forwarded:
+            addresses = [address.strip() for address in forwarded.split(',')]
+            return addresses[-min(num_proxies, len(addresses))]
+        return request.META.get('REMOTE_ADDR')
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    """Keyed on the email being logged in or signed up, ignoring case"""
+
+    def get_key(self, request, view):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+    default_rate = '30/min'
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = 'login_email'
+    default_rate = '5/min'
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+    default_rate = '20/hour'
+
+
+class SignupEmailThrottle(EmailThrottle):
+    scope = 'signup_email'
+    default_rate = '5/hour'
@@ -0,0 +1,169 @@
+import datetime
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from core.bloom import BloomFilter
+from core.models import RevokedToken
+
+
+SALT = 'user.tokens'
+# Revocations committed this long before the previous sync are fetched again.
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+
+def signing_keys():
+    """Keys tokens are verified with; new tokens are signed with the first
+
+    Prepend a new key to ``AUTH_TOKEN_SIGNING_KEYS`` to rotate it in, and
+    drop the old one once the tokens it signed have expired.
+    """
+    return getattr(settings, 'AUTH_TOKEN_SIGNING_KEYS', None) or [settings.SECRET_KEY]
+
+
+def password_hash(user):
+    """Changes with the password, so a password change ends every token"""
+    return user.get_session_auth_hash()[:16]
+
+
+def is_signed_token(key):
+    # Legacy ``authtoken`` keys are 40 hex characters.
+    return ':' in key
+
+
+class SignedToken:
+    """The verified payload of a signed token, set as ``request.auth``"""
+
+    def __init__(self, key, payload):
+        self.key = key
+        self.user_id = payload['u']
+        self.jti = payload['j']
+        self.expires = payload['e']
+        self.password_hash = payload['p']
+
+    @property
+    def expires_at(self):
+        return datetime.datetime.fromtimestamp(self.expires, tz=datetime.timezone.utc)
+
+
+def issue_token(user):
+    payload = {
+        'u': user.pk,
+        'j': uuid.uuid4().hex,
+        'e': int(time.time()) + getattr(settings, 'AUTH_TOKEN_TTL', 7 * 24 * 3600),
+        'p': password_hash(user),
+    }
+    key = signing.dumps(payload, key=signing_keys()[0], salt=SALT, compress=True)
+    return SignedToken(key, payload)
+
+
+def read_token(key):
+    """Verify ``key`` without touching the database
+
+    Raises ``signing.SignatureExpired`` for expired tokens and
+    ``signing.BadSignature`` for anything else that does not verify.
+    """
+    for signing_key in signing_keys():
+        try:
+            payload = signing.loads(key, key=signing_key, salt=SALT)
+            break
+        except signing.BadSignature:
+            continue
+    else:
+        raise signing.BadSignature('Token signature does not match any key')
+    if payload['e'] <= time.time():
+        raise signing.SignatureExpired('Token expired')
+    return SignedToken(key, payload)
+
+
+class RevocationIndex:
+    """Which token ids were revoked, answered from memory
+
+    A Bloom filter holds the ids revoked as of the last rebuild and a set
+    holds the ones revoked since, fetched every ``sync_interval`` seconds.
+    Only ids the filter matches are confirmed with a query, so a token that
+    was never revoked is checked without one. The filter is rebuilt every
+    ``rebuild_interval`` seconds, dropping expired ids.
+    """
+
+    def __init__(self, sync_interval=10, rebuild_interval=600, error_rate=0.01):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.error_rate = error_rate
+        self.bloom = None
+        self.recent = set()
+        self.synced_at = None
+        self._next_sync = 0
+        self._next_rebuild = 0
+        self._lock = threading.Lock()
+
+    def _rebuild(self, now):
+        RevokedToken.objects.filter(expires_at__lte=now).delete()
+        jtis = list(RevokedToken.objects.values_list('jti', flat=True))
+        bloom = BloomFilter(max(2 * len(jtis), 1024), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self.bloom, self.recent = bloom, set()
+
+    def refresh(self):
+        if time.monotonic() < self._next_sync:
+            return
+        with self._lock:
+            started = time.monotonic()
+            if started < self._next_sync:
+                return
+            now = timezone.now()
+            if self.bloom is None or started >= self._next_rebuild:
+                self._rebuild(now)
+                self._next_rebuild = started + self.rebuild_interval
+            else:
+                self.recent.update(RevokedToken.objects.filter(
+                    revoked_at__gte=self.synced_at - SYNC_OVERLAP,
+                ).values_list('jti', flat=True))
+            self.synced_at = now
+            self._next_sync = started + self.sync_interval
+
+    def add(self, jti):
+        with self._lock:
+            self.recent.add(jti)
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti in self.recent:
+            return True
+        if jti not in self.bloom:
+            return False
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        if revoked:
+            self.add(jti)
+        return revoked
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_revocation_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RevocationIndex(
+                getattr(settings, 'AUTH_TOKEN_REVOCATION_SYNC', 10),
+                getattr(settings, 'AUTH_TOKEN_REVOCATION_REBUILD', 600),
+            )
+        return _index
+
+
+def reset_revocation_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def revoke_token(token):
+    RevokedToken.objects.get_or_create(jti=token.jti, defaults={'expires_at': token.expires_at})
+    get_revocation_index().add(token.jti)
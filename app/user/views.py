@@ -1,22 +1,69 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from user import tokens
+from user.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
+from user.throttling import LoginEmailThrottle, LoginIPThrottle, SignupEmailThrottle, SignupIPThrottle
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    # DRF authenticates before it throttles, and Basic auth would hash a password.
+    authentication_classes = ()
+    throttle_classes = (SignupIPThrottle, SignupEmailThrottle)
 
 
 class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    authentication_classes = ()
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response(token_response(tokens.issue_token(serializer.validated_data['user'])))
+
+
+def token_response(token):
+    return {'token': token.key, 'expires_at': token.expires_at}
+
+
+class RefreshTokenView(APIView):
+    """Exchange the token the request was made with for a new one
+
+    A signed token is revoked as it is replaced. Legacy tokens stay valid
+    so clients can move over to signed tokens at their own pace.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        if isinstance(request.auth, tokens.SignedToken):
+            tokens.revoke_token(request.auth)
+        return Response(token_response(tokens.issue_token(request.user)))
+
+
+class RevokeTokenView(APIView):
+    """Revoke the token the request was made with"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        if isinstance(request.auth, tokens.SignedToken):
+            tokens.revoke_token(request.auth)
+        else:
+            request.auth.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):